@@ -1,9 +1,11 @@
 # api/auth.py
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from pydantic import BaseModel
 
 from internal.auth import create_access_token, get_current_user
+from internal.login_throttle import LoginThrottled, login_throttle
 from data.db.handlers.user import login_user
 from data.db.models.user import User
 from data.schemas.user import UserRead
@@ -23,15 +25,32 @@ class Token(BaseModel):
   response_model=Token,
   summary="Authenticate and get a JWT containing the full user",
 )
-async def login(data: LoginData) -> dict[str, str]:
-  orm_user = login_user(data.username, data.password)
+async def login(data: LoginData, request: Request) -> dict[str, str]:
+  client_ip = request.client.host if request.client else "unknown"
+
+  # Refuse floods before spending Argon2 CPU on them
+  try:
+    login_throttle.check(data.username, client_ip)
+    async with login_throttle.verification_slot(data.username, client_ip):
+      # Argon2 and the DB lookup are blocking, keep them off the event loop
+      orm_user = await asyncio.to_thread(login_user, data.username, data.password)
+  except LoginThrottled as e:
+    raise HTTPException(
+      status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+      detail="Too many login attempts, try again later",
+      headers={"Retry-After": str(max(round(e.retry_after), 1))},
+    )
+
   if not orm_user:
+    login_throttle.record_failure(data.username, client_ip)
     raise HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Invalid username or password",
       headers={"WWW-Authenticate": "Bearer"},
     )
 
+  login_throttle.record_success(data.username, client_ip)
+
   # Build payload from every ORM column except password
   payload = {
     col.name: getattr(orm_user, col.name)
@@ -1,21 +1,138 @@
 # api/chat.py
 
+import asyncio
+import logging
+from uuid import uuid4
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status
-from typing import Optional
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
 
 from api.auth import User, get_current_user
+from api.protocol import ChatProtocol, ProtocolError
+from data.db.handlers.transcript import (
+  append_transcript_message, get_transcript, get_transcript_messages, start_transcript, transcript_failed,
+  transcript_queue
+)
+from internal.admission import AdmissionRejected, chat_admission, new_prompt_bucket, rejected_counter, run_turn
+from internal.profiler import profiler
 from models.action import ActionAssistant
+from models.conversation import Conversation
 from models.information import InformationAssistant
+from models.usage import merge_usage, new_usage, report_turn_usage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def _send_busy(
+  websocket: WebSocket,
+  protocol: ChatProtocol,
+  prompt_id: Any,
+  reason: str,
+  retry_after: float,
+) -> None:
+  """
+  Tell the client its prompt was not processed because the server is busy.
+  """
+  await protocol.send(websocket, {
+    "type": "busy",
+    "id": prompt_id,
+    "reason": reason,
+    "retry_after": round(retry_after, 1),
+    "message": "The assistant is busy right now, please try again in a moment."
+  })
+
+async def _send_error(
+  websocket: WebSocket,
+  protocol: ChatProtocol,
+  prompt_id: Any,
+  code: str,
+  message: str,
+) -> None:
+  """
+  Tell the client a frame or prompt could not be handled.
+  """
+  await protocol.send(websocket, {"type": "error", "id": prompt_id, "code": code, "message": message})
+
+async def _resume_conversation(
+  conversation_id: str,
+  user: Optional[User],
+) -> Optional[tuple[Conversation, str, list[dict[str, str]]]]:
+  """
+  Rebuild a conversation from its transcript instead of replaying LLM calls.
+  Returns the conversation, the agent to continue with and the visible
+  history, or None if the transcript does not exist or belongs to someone else.
+  """
+  # Make sure nothing of this conversation is still waiting in the queue
+  await transcript_queue.flush()
+
+  transcript = await asyncio.to_thread(get_transcript, conversation_id)
+  if transcript is None or transcript.user_id != (user.id if user else None):
+    return None
+
+  conversation = Conversation(id=conversation_id)
+  next_agent = 'information_agent'
+  history: list[dict[str, str]] = []
+  for msg in await asyncio.to_thread(get_transcript_messages, conversation_id):
+    if msg.identity == 'user':
+      conversation.append(HumanMessage(content=msg.content))
+    else:
+      conversation.append(AIMessage(content=msg.content))
+      next_agent = msg.identity
+    history.append({"identity": msg.identity, "message": msg.content})
+  return conversation, next_agent, history
+
+def _run_turn(
+  info_agent: InformationAssistant,
+  action_agent: ActionAssistant,
+  conversation: Conversation,
+  next_agent: str,
+  prompt: str,
+) -> tuple[str, Optional[dict[str, Any]]]:
+  """
+  Run the agents for a single user prompt until one of them answers.
+  Returns the next agent and the frame to send (if any).
+  """
+  agents_invoked: list[str] = []
+  turn_start = len(conversation)
+  usage = new_usage()
+
+  while True:
+    # Invoke the agent
+    current_agent = next_agent
+    agent = info_agent if current_agent == 'information_agent' else action_agent
+    result = agent.invoke(
+      conversation=conversation,
+      agents_invoked=agents_invoked,
+      user_prompt=prompt
+    )
+    agents_invoked.append(current_agent)
+    merge_usage(usage, result['usage'])
+
+    # Parse the result
+    response = result['response']
+    next_agent = result['next_agent']
+
+    # Handle the result
+    if current_agent == next_agent:
+      report_turn_usage(usage)
+      return next_agent, {"identity": current_agent, "message": response}
+    elif next_agent in agents_invoked:
+      report_turn_usage(usage)
+      return next_agent, None
+    else:
+      # Let the next agent answer the prompt from scratch
+      conversation.truncate(turn_start)
+
 @router.websocket("/ws")
 async def websocket_chat(websocket: WebSocket):
   """
   WebSocket endpoint for real-time chat with the AI agent.
   """
-  # Accept the WebSocket connection
-  await websocket.accept()
+  # Negotiate the wire protocol and accept the WebSocket connection
+  protocol = ChatProtocol.negotiate(websocket)
+  await websocket.accept(subprotocol=protocol.subprotocol)
 
   # Attempt optional authentication
   user: Optional[User] = None
@@ -25,61 +142,104 @@ async def websocket_chat(websocket: WebSocket):
     parts = raw_token.split(" ", 1)
     token = parts[1] if len(parts) == 2 else parts[0]
     try:
-      user = get_current_user(token)
+      user = await asyncio.to_thread(get_current_user, token)
     except HTTPException:
       # Invalid token, proceed as anonymous
       user = None
 
   # Log connection
   username = user.username if user else "anonymous"
-  print(f"{username} connected to chat")
+  logger.info("%s connected to chat", username, extra={"protocol": protocol.name})
+
+  # Key used for per-user admission limits. Anonymous clients behind one
+  # proxy or NAT share an address, so each socket gets its own key and the
+  # global limit bounds them together.
+  user_key = f"user:{user.id}" if user else f"anon:{uuid4().hex}"
+  prompt_bucket = new_prompt_bucket()
 
   # Main chat loop
   try:
     # Set up the two agents
     info_agent = InformationAssistant()
     action_agent = ActionAssistant()
-    messages: list = []
+    conversation = Conversation()
     next_agent = 'information_agent'
 
+    # Resume an earlier conversation when asked, otherwise start a transcript
+    conversation_id = websocket.query_params.get("conversation_id")
+    resumed = await _resume_conversation(conversation_id, user) if conversation_id else None
+    if resumed:
+      conversation, next_agent, history = resumed
+    else:
+      conversation_id = await start_transcript(user.id if user else None)
+      if conversation_id is not None:
+        conversation.id = conversation_id
+      history = []
+    # Without a written transcript the session still works, it just is not saved
+    persist = conversation_id is not None
+    await protocol.send(websocket, {
+      "type": "session",
+      "protocol": protocol.name,
+      "conversation_id": conversation_id,
+      "resumed": resumed is not None,
+      "history": history
+    })
+    protocol.end_turn(record=False)
+
     while True:
-      # Receive user message
-      prompt = await websocket.receive_text()
-      agents_invoked: list[str] = []
-
-      while True:
-        # Invoke the agent
-        current_agent = next_agent
-        agent = info_agent if current_agent == 'information_agent' else action_agent
-        result = agent.invoke(
-          messages=messages,
-          agents_invoked=agents_invoked,
-          user_prompt=prompt
-        )
-        agents_invoked.append(current_agent)
-
-        # Parse the result
-        messages = result['messages']
-        response = result['response']
-        next_agent = result['next_agent']
-
-        # Handle the result
-        if current_agent == next_agent:
-          await websocket.send_json({
-            "identity": current_agent,
-            "message": response
-          })
-          break
-        elif next_agent in agents_invoked:
-          break
-        else:
-          messages.pop()
+      # Receive the next frame, which may batch several prompts
+      try:
+        envelopes = await protocol.receive(websocket)
+      except ProtocolError as e:
+        await _send_error(websocket, protocol, None, "bad_frame", str(e))
+        protocol.end_turn()
+        continue
+
+      # The inbound bytes of a batched frame count toward its first prompt
+      for envelope in envelopes:
+        try:
+          prompt_id = envelope.get("id")
+          prompt = envelope.get("text")
+          if envelope.get("type") != "prompt" or not isinstance(prompt, str) or not prompt.strip():
+            await _send_error(websocket, protocol, prompt_id, "bad_envelope", "Expected a prompt envelope with text")
+            continue
+
+          # Drop prompts sent faster than the socket's rate allows
+          if not prompt_bucket.try_acquire():
+            rejected_counter.inc(reason="rate_limited")
+            await _send_busy(websocket, protocol, prompt_id, "rate_limited", prompt_bucket.retry_after())
+            continue
+          await protocol.send(websocket, {"type": "ack", "id": prompt_id})
+
+          # Run the turn off the event loop once a slot is free
+          try:
+            async with chat_admission.slot(user_key):
+              with profiler.track("turns"):
+                next_agent, frame = await run_turn(
+                  _run_turn, info_agent, action_agent, conversation, next_agent, prompt
+                )
+          except AdmissionRejected as e:
+            await _send_busy(websocket, protocol, prompt_id, e.reason, e.retry_after)
+            continue
+
+          # Persist the visible transcript without waiting for the database
+          if persist and not await append_transcript_message(conversation_id, 'user', prompt):
+            persist = not transcript_failed(conversation_id)
+          if frame is not None:
+            await protocol.send(websocket, {"type": "response", "id": prompt_id, **frame})
+            if persist and not await append_transcript_message(conversation_id, frame["identity"], frame["message"]):
+              persist = not transcript_failed(conversation_id)
+        finally:
+          # Every outcome closes its turn, so busy and error frames are not
+          # counted in the next one
+          protocol.end_turn()
 
   except WebSocketDisconnect:
     # Handle client disconnection
-    print(f"{username} disconnected from chat")
+    logger.info("%s disconnected from chat", username)
 
   except Exception as e:
     # Unexpected error: notify client and close connection
-    await websocket.send_text(f"Error: {str(e)}")
+    logger.exception("Chat session of %s failed", username)
+    await _send_error(websocket, protocol, None, "internal_error", str(e))
     await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
@@ -0,0 +1,32 @@
+# api/metrics.py
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from internal.auth import get_admin_user
+from internal.metrics import registry
+from internal.watchdog import watchdog
+
+router = APIRouter()
+
+@router.get(
+  "/",
+  summary="Snapshot of all in-process metrics",
+)
+async def get_metrics() -> dict[str, Any]:
+  """
+  Return counters, gauges and histograms collected by this worker.
+  """
+  return registry.snapshot()
+
+@router.get(
+  "/loop",
+  summary="Event-loop lag and recent stalls with the stack that blocked the loop",
+  dependencies=[Depends(get_admin_user)],
+)
+async def get_loop_report() -> dict[str, Any]:
+  """
+  Return the worst lag seen and the stacks captured for recent stalls.
+  """
+  return watchdog.report()
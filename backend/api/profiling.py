@@ -0,0 +1,71 @@
+# api/profiling.py
+
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
+
+from internal.auth import get_admin_user
+from internal.profiler import ProfileSession, profiler
+
+# Every route here is admin-only
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+class ProfileRequest(BaseModel):
+  mode: Literal["requests", "turns", "duration"] = "turns"
+  count: int = Field(1, ge=1, le=1000)
+  seconds: float = Field(10.0, gt=0, le=300)
+  interval_ms: float = Field(5.0, ge=1, le=100)
+
+@router.post(
+  "/start",
+  summary="Sample the next N requests or chat turns, or a fixed duration",
+)
+async def start_profiling(data: ProfileRequest) -> dict[str, Any]:
+  try:
+    session = profiler.start(ProfileSession(
+      mode=data.mode,
+      count=data.count,
+      seconds=data.seconds,
+      interval=data.interval_ms / 1000,
+    ))
+  except RuntimeError as e:
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+  return session.status()
+
+@router.post(
+  "/stop",
+  summary="End the running profiling session early",
+)
+async def stop_profiling() -> dict[str, Any]:
+  session = profiler.stop()
+  if session is None:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiling session")
+  return session.status()
+
+@router.get(
+  "/",
+  summary="Status of the current or last profiling session",
+)
+async def get_profiling_status() -> dict[str, Any]:
+  if profiler.session is None:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiling session")
+  return profiler.session.status()
+
+@router.get(
+  "/flamegraph",
+  summary="Download the last profile as speedscope JSON or collapsed stacks",
+)
+async def get_flamegraph(
+  format: Literal["speedscope", "collapsed"] = Query("speedscope"),
+) -> Response:
+  session = profiler.session
+  if session is None:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiling session")
+  if format == "collapsed":
+    return PlainTextResponse(session.collapsed())
+  return JSONResponse(
+    session.speedscope(),
+    headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'},
+  )
@@ -0,0 +1,170 @@
+# api/protocol.py
+
+import json
+import time
+from typing import Any, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from internal.metrics import registry
+
+# Optional fast encoders, the protocol falls back to what is installed
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
+JSON_V1 = "round2.json.v1"
+MSGPACK_V1 = "round2.msgpack.v1"
+LEGACY = "legacy"
+
+# Metrics
+wire_bytes_counter = registry.counter("chat_ws_bytes_total", "Chat WebSocket payload bytes before compression")
+turn_bytes_histogram = registry.histogram(
+  "chat_ws_turn_bytes",
+  "Chat WebSocket payload bytes per turn, both directions",
+  buckets=(64, 256, 1024, 4096, 16384, 65536, 262144),
+)
+turn_encode_histogram = registry.histogram(
+  "chat_ws_turn_encode_seconds",
+  "CPU time of the event-loop thread spent encoding and decoding frames per turn",
+  buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01),
+)
+
+
+def _dumps_json(obj: Any) -> str:
+  if orjson is not None:
+    return orjson.dumps(obj).decode()
+  return json.dumps(obj, separators=(",", ":"))
+
+def _loads_json(data: Any) -> Any:
+  if orjson is not None:
+    return orjson.loads(data)
+  return json.loads(data)
+
+
+def supported_subprotocols() -> list[str]:
+  """
+  Subprotocols this server can speak, best first.
+  """
+  return ([MSGPACK_V1] if msgpack is not None else []) + [JSON_V1]
+
+
+class ProtocolError(Exception):
+  """
+  Raised when a client frame cannot be decoded.
+  """
+
+
+class ChatProtocol:
+  """
+  Typed envelopes over one negotiated subprotocol.
+
+  Client -> server: {"type": "prompt", "id": ..., "text": ...}, or a list
+  of prompt envelopes in a single frame.
+  Server -> client: "session", "ack", "response", "busy" and "error"
+  envelopes, each echoing the prompt "id" where there is one.
+
+  Clients that do not ask for a subprotocol get the legacy protocol:
+  plain text prompts in, {"identity", "message"} JSON frames out, without
+  the "session" and "ack" envelopes.
+  """
+  def __init__(self, name: str) -> None:
+    self.name = name
+    self.binary = name == MSGPACK_V1
+    self._bytes = 0
+    self._encode_seconds = 0.0
+
+  @classmethod
+  def negotiate(cls, websocket: WebSocket) -> "ChatProtocol":
+    offered = websocket.scope.get("subprotocols", [])
+    for name in supported_subprotocols():
+      if name in offered:
+        return cls(name)
+    return cls(LEGACY)
+
+  @property
+  def subprotocol(self) -> Optional[str]:
+    return None if self.name == LEGACY else self.name
+
+  def _count(self, direction: str, size: int, seconds: float) -> None:
+    self._bytes += size
+    self._encode_seconds += seconds
+    wire_bytes_counter.inc(size, protocol=self.name, direction=direction)
+
+  def end_turn(self, record: bool = True) -> None:
+    """
+    Record the bytes and codec CPU of the turn that just finished, or
+    only reset them for frames that are not part of a turn.
+    """
+    if record:
+      turn_bytes_histogram.observe(self._bytes, protocol=self.name)
+      turn_encode_histogram.observe(self._encode_seconds, protocol=self.name)
+    self._bytes = 0
+    self._encode_seconds = 0.0
+
+  def _to_legacy(self, envelope: dict[str, Any]) -> Optional[dict[str, Any]]:
+    kind = envelope["type"]
+    # Old clients render every frame as a chat bubble and know neither
+    if kind in ("ack", "session"):
+      return None
+    if kind == "response":
+      return {"identity": envelope["identity"], "message": envelope["message"]}
+    legacy = {"identity": "system", "status": kind}
+    legacy.update({k: v for k, v in envelope.items() if k not in ("type", "id")})
+    return legacy
+
+  async def send(self, websocket: WebSocket, envelope: dict[str, Any]) -> None:
+    """
+    Encode and send one envelope.
+    """
+    started = time.thread_time()
+    if self.name == LEGACY:
+      payload = self._to_legacy(envelope)
+      if payload is None:
+        return
+      data: Any = _dumps_json(payload)
+    elif self.binary:
+      data = msgpack.packb(envelope)
+    else:
+      data = _dumps_json(envelope)
+    elapsed = time.thread_time() - started
+
+    if isinstance(data, bytes):
+      await websocket.send_bytes(data)
+      self._count("out", len(data), elapsed)
+    else:
+      await websocket.send_text(data)
+      self._count("out", len(data) if data.isascii() else len(data.encode()), elapsed)
+
+  async def receive(self, websocket: WebSocket) -> list[dict[str, Any]]:
+    """
+    Wait for the next frame and return the envelopes in it.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+      raise WebSocketDisconnect(message.get("code", 1000))
+
+    text, data = message.get("text"), message.get("bytes")
+    started = time.thread_time()
+    try:
+      if self.name == LEGACY:
+        decoded: Any = {"type": "prompt", "id": None, "text": text if text is not None else (data or b"").decode()}
+      elif self.binary and data is not None:
+        decoded = msgpack.unpackb(data)
+      else:
+        decoded = _loads_json(text if text is not None else data)
+    except Exception as e:
+      raise ProtocolError(f"Could not decode frame: {e}")
+    size = len(data) if data is not None else len((text or "").encode())
+    self._count("in", size, time.thread_time() - started)
+
+    envelopes = decoded if isinstance(decoded, list) else [decoded]
+    if not all(isinstance(env, dict) for env in envelopes):
+      raise ProtocolError("Frames must contain an envelope or a list of envelopes")
+    return envelopes
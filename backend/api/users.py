@@ -0,0 +1,40 @@
+# api/users.py
+
+import asyncio
+import io
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from data.db.handlers.user_import import import_executor, import_users, iter_user_rows
+from data.schemas.user import UserImportReport
+from internal.auth import get_admin_user
+
+# Every route here is admin-only
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+@router.post(
+  "/import",
+  response_model=UserImportReport,
+  summary="Create users in bulk from a CSV or JSON lines request body",
+)
+async def import_users_endpoint(
+  request: Request,
+  format: Literal["csv", "jsonl"] = Query("csv"),
+) -> UserImportReport:
+  """
+  The body is spooled to disk as it arrives, then imported on the import
+  thread, one import at a time. Rows that fail are reported without
+  stopping the import.
+  """
+  with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as body:
+    async for chunk in request.stream():
+      body.write(chunk)
+    body.seek(0)
+
+    def run() -> UserImportReport:
+      with io.TextIOWrapper(body, encoding="utf-8-sig", newline="") as stream:
+        return import_users(iter_user_rows(stream, format))
+
+    return await asyncio.get_running_loop().run_in_executor(import_executor, run)
@@ -1,5 +1,6 @@
 # app.py
 
+import logging
 import os
 from contextlib import asynccontextmanager
 
@@ -9,18 +10,32 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from internal.log import setup_logging
+
+# Route all logging through the queue before anything else logs
+setup_logging()
+logger = logging.getLogger(__name__)
+
 from api.auth import router as auth_router
 from api.chat import router as chat_router
 from api.information import router as information_router
+from api.metrics import router as metrics_router
+from api.profiling import router as profiling_router
+from api.users import router as users_router
 
 from data.db.setup import init_db
 from data.db.handlers.user import get_user_by_email, create_user
+from data.db.handlers.transcript import transcript_queue
+from data.db.handlers.user_import import shutdown_hash_pool
 from data.schemas.user import UserCreate
+from internal.profiler import ProfilingMiddleware
+from internal.watchdog import LOOP_WATCHDOG, watchdog
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Initialize DB and ensure a root user exists before the app starts.
+    Initialize DB and ensure a root user exists before the app starts,
+    and flush background writers when it stops.
     """
     # 1) Create tables if they don’t exist
     init_db()
@@ -39,11 +54,23 @@ async def lifespan(app: FastAPI):
             password=root_password
         )
         create_user(root_in)
-        print(f"[app.py]: Created root user: {root_email}")
+        logger.info("Created root user: %s", root_email)
+
+    # 4) Start persisting chat transcripts in the background
+    transcript_queue.start()
+
+    # 5) Watch for handlers that block the event loop
+    if LOOP_WATCHDOG:
+        watchdog.start()
 
     # Let FastAPI continue to startup
     yield
 
+    # Write out queued transcripts on graceful shutdown
+    await transcript_queue.stop()
+    await watchdog.stop()
+    shutdown_hash_pool()
+
 # Attach the lifespan
 app = FastAPI(lifespan=lifespan)
 
@@ -61,11 +88,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Tracks requests for on-demand profiling, a no-op while profiling is off
+app.add_middleware(ProfilingMiddleware)
 
 # Mount your auth routes
 app.include_router(auth_router, prefix="/auth")
 app.include_router(chat_router, prefix="/chat")
 app.include_router(information_router, prefix="/information")
+app.include_router(metrics_router, prefix="/metrics")
+app.include_router(profiling_router, prefix="/profiling")
+app.include_router(users_router, prefix="/users")
 
 
 def main():
@@ -77,7 +109,8 @@ def main():
     # Read host and port from environment with sensible defaults
     host = "127.0.0.1"
     port = int(os.getenv("DEV_PORT", os.getenv("PORT", "8000")))
-    uvicorn.run("app:app", host=host, port=port, reload=True)
+    # Compress chat frames on the wire when the client supports it
+    uvicorn.run("app:app", host=host, port=port, reload=True, ws_per_message_deflate=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+# data/db/handlers/transcript.py
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import insert
+
+from data.db.setup import LocalSession
+from data.db.models.transcript import Transcript, TranscriptMessage
+from data.db.write_behind import WriteBehindQueue
+from data.schemas.transcript import TranscriptRead, TranscriptMessageRead
+
+
+def _write_transcript_batch(items: list[tuple[str, dict[str, Any]]]) -> None:
+  """
+  Insert a batch of queued transcripts and messages in one transaction.
+  Transcripts go first so the messages' foreign keys resolve.
+  """
+  transcripts = [row for kind, row in items if kind == "transcript"]
+  messages = [row for kind, row in items if kind == "message"]
+  with LocalSession() as db:
+    if transcripts:
+      db.execute(insert(Transcript), transcripts)
+    if messages:
+      db.execute(insert(TranscriptMessage), messages)
+    db.commit()
+
+
+def _transcript_id(item: tuple[str, dict[str, Any]]) -> str:
+  kind, row = item
+  return row["id"] if kind == "transcript" else row["transcript_id"]
+
+
+# Transcripts whose row could not be written, their messages are not queued
+_failed_transcripts: "OrderedDict[str, None]" = OrderedDict()
+_failed_lock = threading.Lock()
+
+def _on_transcript_drop(items: list[tuple[str, dict[str, Any]]]) -> None:
+  with _failed_lock:
+    for kind, row in items:
+      if kind == "transcript":
+        _failed_transcripts[row["id"]] = None
+    while len(_failed_transcripts) > 10000:
+      _failed_transcripts.popitem(last=False)
+
+
+# Write-behind queue feeding the transcript tables – tune via env vars
+transcript_queue = WriteBehindQueue(
+  name="transcripts",
+  write_batch=_write_transcript_batch,
+  batch_size=int(os.getenv("TRANSCRIPT_BATCH_SIZE", "100")),
+  flush_interval=float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "1.0")),
+  max_pending=int(os.getenv("TRANSCRIPT_MAX_PENDING", "10000")),
+  put_timeout=float(os.getenv("TRANSCRIPT_PUT_TIMEOUT", "0.5")),
+  group_key=_transcript_id,
+  on_drop=_on_transcript_drop,
+)
+
+
+def transcript_failed(transcript_id: str) -> bool:
+  """
+  Whether the transcript row was dropped, so nothing more should be queued for it.
+  """
+  return transcript_id in _failed_transcripts
+
+
+async def start_transcript(user_id: Optional[int]) -> Optional[str]:
+  """
+  Queue a new transcript and return its id, or None if it was dropped.
+  """
+  transcript_id = uuid.uuid4().hex
+  if not await transcript_queue.put(("transcript", {"id": transcript_id, "user_id": user_id})):
+    return None
+  return transcript_id
+
+
+async def append_transcript_message(transcript_id: str, identity: str, content: str) -> bool:
+  """
+  Queue a message for a transcript, returns False if it was dropped or
+  the transcript itself could not be written.
+  """
+  if transcript_failed(transcript_id):
+    return False
+  return await transcript_queue.put(
+    ("message", {"transcript_id": transcript_id, "identity": identity, "content": content})
+  )
+
+
+def get_transcript(transcript_id: str) -> Optional[TranscriptRead]:
+  """
+  Retrieve a transcript by id, returned as a Pydantic TranscriptRead.
+  """
+  with LocalSession() as db:
+    transcript: Optional[Transcript] = db.query(Transcript).filter(Transcript.id == transcript_id).first()
+    if transcript is None:
+      return None
+    return TranscriptRead.model_validate(transcript)
+
+
+def get_transcript_messages(transcript_id: str) -> list[TranscriptMessageRead]:
+  """
+  Retrieve every message of a transcript in the order they were sent.
+  """
+  with LocalSession() as db:
+    messages = (
+      db.query(TranscriptMessage)
+        .filter(TranscriptMessage.transcript_id == transcript_id)
+        .order_by(TranscriptMessage.id)
+        .all()
+    )
+    return [TranscriptMessageRead.model_validate(m) for m in messages]
@@ -1,18 +1,21 @@
 # data/db/handlers/user.py
 
+import secrets
+from functools import lru_cache
 from typing import Optional
-from passlib.context import CryptContext
 
+from data.db.hashing import pwd_context
 from data.db.setup import LocalSession
 from data.db.models.user import User
 from data.schemas.user import UserRead, UserCreate
 
-# Password‐hashing context
-pwd_context: CryptContext = CryptContext(
-  schemes=["argon2", "bcrypt_sha256"],
-  default="argon2",
-  deprecated="auto",
-)
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+  """
+  Hash checked for unknown usernames, so they take as long as known ones.
+  """
+  return pwd_context.hash(secrets.token_urlsafe(16))
 
 
 def get_user_by_email(email: str) -> Optional[UserRead]:
@@ -69,6 +72,8 @@ def login_user(username: str, password: str) -> Optional[User]:
         .first()
     )
     if user is None:
+      # Verify anyway so unknown usernames cannot be told apart by timing
+      pwd_context.verify(password, _dummy_hash())
       return None
 
     if not pwd_context.verify(password, user.password):
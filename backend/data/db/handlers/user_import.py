@@ -0,0 +1,240 @@
+# data/db/handlers/user_import.py
+
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, TextIO, Union
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from data.db.hashing import hash_password, init_hash_worker
+from data.db.setup import LocalSession
+from data.db.models.user import User
+from data.schemas.user import UserCreate, UserImportError, UserImportReport
+
+logger = logging.getLogger(__name__)
+
+# Import settings – override via env vars
+USER_IMPORT_CHUNK_SIZE: int = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "500"))
+USER_IMPORT_WORKERS: int = int(os.getenv("USER_IMPORT_WORKERS", str(os.cpu_count() or 2)))
+USER_IMPORT_MAX_ERRORS: int = int(os.getenv("USER_IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# A row as read from the file: its number and the fields, or why it could not be read
+SourceRow = tuple[int, Union[dict[str, Any], ValueError]]
+
+
+def iter_user_rows(stream: TextIO, fmt: str) -> Iterator[SourceRow]:
+  """
+  Stream rows from a CSV file with a header line, or from JSON lines.
+  """
+  if fmt == "csv":
+    reader = csv.DictReader(stream)
+    for row in reader:
+      yield reader.line_num, row
+  elif fmt == "jsonl":
+    for number, line in enumerate(stream, start=1):
+      if not line.strip():
+        continue
+      try:
+        data = json.loads(line)
+      except json.JSONDecodeError as e:
+        yield number, ValueError(f"Invalid JSON: {e.msg}")
+        continue
+      yield number, data if isinstance(data, dict) else ValueError("Expected a JSON object")
+  else:
+    raise ValueError(f"Unknown import format '{fmt}', expected one of {IMPORT_FORMATS}")
+
+
+# Hashing workers are started once and shared by all imports, so a request
+# does not pay for spawning them. Imports run one at a time on their own
+# thread, so they do not hold one of the default executor's threads.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-import")
+
+
+def get_hash_pool(workers: int = USER_IMPORT_WORKERS) -> ProcessPoolExecutor:
+  """
+  The shared hashing pool, created with `workers` processes on first use.
+  """
+  global _hash_pool
+  with _hash_pool_lock:
+    if _hash_pool is None:
+      # Spawned workers, forking a process with running threads is not safe
+      _hash_pool = ProcessPoolExecutor(
+        max_workers=max(workers, 1),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_hash_worker,
+      )
+    return _hash_pool
+
+
+def shutdown_hash_pool(pool: Optional[ProcessPoolExecutor] = None) -> None:
+  """
+  Stop the hashing workers, or only those of `pool` if it is still the
+  shared one. The next import starts new ones.
+  """
+  global _hash_pool
+  with _hash_pool_lock:
+    if _hash_pool is not None and pool in (None, _hash_pool):
+      _hash_pool.shutdown(wait=False, cancel_futures=True)
+      _hash_pool = None
+
+
+class _Import:
+  """
+  Bookkeeping of one import run.
+  """
+  def __init__(self, max_errors: int) -> None:
+    self.max_errors = max_errors
+    self.total = 0
+    self.created = 0
+    self.failed = 0
+    self.errors: list[UserImportError] = []
+    self.seen_usernames: set[str] = set()
+    self.seen_emails: set[str] = set()
+
+  def fail(self, row: int, username: Optional[str], error: str) -> None:
+    self.failed += 1
+    if len(self.errors) < self.max_errors:
+      self.errors.append(UserImportError(row=row, username=username, error=error))
+
+  def validate(self, chunk: list[SourceRow]) -> list[tuple[int, UserCreate]]:
+    """
+    Validate a chunk and drop rows that clash with earlier rows or existing users.
+    """
+    valid: list[tuple[int, UserCreate]] = []
+    for row, data in chunk:
+      self.total += 1
+      if isinstance(data, ValueError):
+        self.fail(row, None, str(data))
+        continue
+      try:
+        user = UserCreate.model_validate(data)
+      except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        # Raw values can be any JSON type, the report expects a string
+        username = data.get("username")
+        self.fail(row, str(username) if username is not None else None, problems)
+        continue
+      email = user.email.lower()
+      if user.username in self.seen_usernames:
+        self.fail(row, user.username, "Duplicate username in import")
+      elif email in self.seen_emails:
+        self.fail(row, user.username, "Duplicate email in import")
+      else:
+        self.seen_usernames.add(user.username)
+        self.seen_emails.add(email)
+        valid.append((row, user))
+
+    if not valid:
+      return valid
+    # Emails are compared case-insensitively, as within the file above
+    with LocalSession() as db:
+      existing = db.execute(
+        select(User.username, User.email).where(or_(
+          User.username.in_([user.username for _, user in valid]),
+          func.lower(User.email).in_([user.email.lower() for _, user in valid]),
+        ))
+      ).all()
+    taken_usernames = {username for username, _ in existing}
+    taken_emails = {email.lower() for _, email in existing}
+
+    fresh = []
+    for row, user in valid:
+      if user.username in taken_usernames:
+        self.fail(row, user.username, "Username already exists")
+      elif user.email.lower() in taken_emails:
+        self.fail(row, user.username, "Email already exists")
+      else:
+        fresh.append((row, user))
+    return fresh
+
+  def insert(self, users: list[tuple[int, UserCreate]], hashes: Iterable[str]) -> None:
+    """
+    Insert a chunk with one executemany, falling back to row by row when
+    a concurrent writer took one of the usernames or emails meanwhile.
+    """
+    rows = [
+      (row, {"username": user.username, "email": user.email, "password": hashed})
+      for (row, user), hashed in zip(users, hashes)
+    ]
+    if not rows:
+      return
+    with LocalSession() as db:
+      try:
+        db.execute(insert(User), [values for _, values in rows])
+        db.commit()
+        self.created += len(rows)
+        return
+      except IntegrityError:
+        db.rollback()
+
+      # One transaction per row, savepoints are unreliable on pysqlite
+      for row, values in rows:
+        try:
+          db.execute(insert(User), [values])
+          db.commit()
+          self.created += 1
+        except IntegrityError:
+          db.rollback()
+          self.fail(row, values["username"], "Username or email already exists")
+
+
+def import_users(
+  rows: Iterable[SourceRow],
+  chunk_size: int = USER_IMPORT_CHUNK_SIZE,
+  workers: int = USER_IMPORT_WORKERS,
+  max_errors: int = USER_IMPORT_MAX_ERRORS,
+) -> UserImportReport:
+  """
+  Create users from streamed rows. Passwords are hashed across the shared
+  process pool while the previous chunk is being inserted.
+  """
+  state = _Import(max_errors)
+  started = time.monotonic()
+  rows = iter(rows)
+
+  pool = get_hash_pool(workers)
+  pending: Optional[tuple[list[tuple[int, UserCreate]], Iterator[str]]] = None
+  try:
+    while True:
+      chunk = list(islice(rows, chunk_size))
+      users = state.validate(chunk) if chunk else []
+      hashing = None
+      if users:
+        per_worker = max(len(users) // (max(workers, 1) * 4), 1)
+        hashing = (users, pool.map(hash_password, [user.password for _, user in users], chunksize=per_worker))
+
+      if pending is not None:
+        state.insert(*pending)
+      pending = hashing
+      if not chunk:
+        break
+  except BrokenProcessPool:
+    # A worker died, the next import starts fresh ones
+    shutdown_hash_pool(pool)
+    raise
+
+  seconds = time.monotonic() - started
+  logger.info("Imported %d of %d users in %.1fs", state.created, state.total, seconds)
+  return UserImportReport(
+    total=state.total,
+    created=state.created,
+    failed=state.failed,
+    seconds=round(seconds, 3),
+    rows_per_second=round(state.total / seconds, 1) if seconds > 0 else 0.0,
+    errors=state.errors,
+    errors_truncated=state.failed > len(state.errors),
+  )
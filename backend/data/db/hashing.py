@@ -0,0 +1,26 @@
+# data/db/hashing.py
+
+import signal
+
+from passlib.context import CryptContext
+
+# Password‐hashing context. Kept apart from the handlers, so the user
+# import's hashing workers unpickle functions from this module only and
+# do not load the database layer.
+pwd_context: CryptContext = CryptContext(
+  schemes=["argon2", "bcrypt_sha256"],
+  default="argon2",
+  deprecated="auto",
+)
+
+
+def hash_password(password: str) -> str:
+  return pwd_context.hash(password)
+
+
+def init_hash_worker() -> None:
+  """
+  Runs once in each import hashing worker. Ctrl-C is left to the parent,
+  which shuts the pool down.
+  """
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
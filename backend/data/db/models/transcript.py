@@ -0,0 +1,25 @@
+# data/db/models/transcript.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from data.db.setup import Base
+
+def _utcnow() -> datetime:
+  return datetime.now(timezone.utc)
+
+class Transcript(Base):
+  __tablename__ = 'transcripts'
+
+  id = Column(String(32), primary_key=True)
+  user_id = Column(Integer, ForeignKey('users.id'), index=True, nullable=True)
+  created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+
+class TranscriptMessage(Base):
+  __tablename__ = 'transcript_messages'
+
+  id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+  transcript_id = Column(String(32), ForeignKey('transcripts.id'), index=True, nullable=False)
+  identity = Column(String, nullable=False)
+  content = Column(Text, nullable=False)
+  created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
@@ -38,6 +38,7 @@ def init_db() -> None:
   Then create all tables.
   """
   import data.db.models.user
+  import data.db.models.transcript
   Base.metadata.create_all(bind=engine)
 
 
@@ -0,0 +1,171 @@
+# data/db/write_behind.py
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from internal.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Metrics
+queue_depth_gauge = registry.gauge("write_behind_queue_depth", "Items waiting to be persisted")
+written_counter = registry.counter("write_behind_items_written_total", "Items persisted by write-behind queues")
+dropped_counter = registry.counter("write_behind_items_dropped_total", "Items dropped by write-behind queues")
+flush_histogram = registry.histogram("write_behind_flush_seconds", "Duration of write-behind batch writes")
+
+
+class WriteBehindQueue:
+  """
+  Buffers items on the event loop and persists them in batches with a
+  synchronous `write_batch` run in a worker thread. A batch is written when
+  it reaches `batch_size`, after `flush_interval` seconds, on flush() and
+  on stop(). Producers wait at most `put_timeout` for room in the bounded
+  queue, after which the item is dropped and counted.
+
+  When a batch fails it is retried per `group_key` group (e.g. one
+  transcript) and then per item, so one bad row only costs itself.
+  Items that still fail are passed to `on_drop`.
+  """
+  def __init__(
+    self,
+    name: str,
+    write_batch: Callable[[list[Any]], None],
+    batch_size: int = 100,
+    flush_interval: float = 1.0,
+    max_pending: int = 10000,
+    put_timeout: float = 0.5,
+    group_key: Optional[Callable[[Any], Any]] = None,
+    on_drop: Optional[Callable[[list[Any]], None]] = None,
+  ) -> None:
+    self.name = name
+    self.write_batch = write_batch
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.max_pending = max_pending
+    self.put_timeout = put_timeout
+    self.group_key = group_key
+    self.on_drop = on_drop
+
+    self._queue: Optional[asyncio.Queue] = None
+    self._pending: list[Any] = []
+    self._lock: Optional[asyncio.Lock] = None
+    self._task: Optional[asyncio.Task] = None
+
+  def start(self) -> None:
+    """
+    Start the background writer on the running event loop.
+    """
+    if self._task is not None:
+      return
+    self._queue = asyncio.Queue(maxsize=self.max_pending)
+    self._lock = asyncio.Lock()
+    self._task = asyncio.create_task(self._run(), name=f"write-behind-{self.name}")
+
+  async def put(self, item: Any) -> bool:
+    """
+    Queue an item, returns False if it was dropped.
+    """
+    if self._queue is None:
+      dropped_counter.inc(queue=self.name, reason="not_started")
+      return False
+    # asyncio.timeout() rather than wait_for(), which can swallow a cancel
+    try:
+      async with asyncio.timeout(self.put_timeout):
+        await self._queue.put(item)
+    except TimeoutError:
+      dropped_counter.inc(queue=self.name, reason="backpressure")
+      return False
+    queue_depth_gauge.set(self._queue.qsize() + len(self._pending), queue=self.name)
+    return True
+
+  def _drain(self) -> None:
+    while not self._queue.empty():
+      self._pending.append(self._queue.get_nowait())
+
+  async def _write_pending(self) -> None:
+    async with self._lock:
+      batch, self._pending = self._pending, []
+      if not batch:
+        return
+      started = time.monotonic()
+      try:
+        await asyncio.to_thread(self.write_batch, batch)
+        written_counter.inc(len(batch), queue=self.name)
+      except Exception as e:
+        logger.warning("Write-behind queue %s failed a batch of %d items, retrying in parts: %s", self.name, len(batch), e)
+        await asyncio.to_thread(self._write_isolated, batch)
+      flush_histogram.observe(time.monotonic() - started, queue=self.name)
+      queue_depth_gauge.set(self._queue.qsize() + len(self._pending), queue=self.name)
+
+  def _write_isolated(self, batch: list[Any]) -> None:
+    """
+    Write a failed batch again per group, then per item, in worker thread.
+    """
+    groups: dict[Any, list[Any]] = {}
+    for index, item in enumerate(batch):
+      key = self.group_key(item) if self.group_key else index
+      groups.setdefault(key, []).append(item)
+
+    dropped: list[Any] = []
+    for items in groups.values():
+      try:
+        self.write_batch(items)
+        written_counter.inc(len(items), queue=self.name)
+        continue
+      except Exception:
+        if len(items) == 1:
+          dropped.extend(items)
+          continue
+      for item in items:
+        try:
+          self.write_batch([item])
+          written_counter.inc(queue=self.name)
+        except Exception as e:
+          logger.error("Write-behind queue %s dropped an item: %s", self.name, e)
+          dropped.append(item)
+
+    if dropped:
+      dropped_counter.inc(len(dropped), queue=self.name, reason="error")
+      if self.on_drop is not None:
+        self.on_drop(dropped)
+
+  async def _run(self) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      self._pending.append(await self._queue.get())
+      deadline = loop.time() + self.flush_interval
+      while len(self._pending) < self.batch_size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+          break
+        try:
+          async with asyncio.timeout(timeout):
+            self._pending.append(await self._queue.get())
+        except TimeoutError:
+          break
+      await self._write_pending()
+
+  async def flush(self) -> None:
+    """
+    Persist everything queued so far before returning.
+    """
+    if self._queue is None:
+      return
+    self._drain()
+    await self._write_pending()
+
+  async def stop(self) -> None:
+    """
+    Stop the background writer and persist what is left.
+    """
+    if self._task is None:
+      return
+    self._task.cancel()
+    try:
+      await self._task
+    except asyncio.CancelledError:
+      pass
+    self._task = None
+    await self.flush()
@@ -0,0 +1,24 @@
+# data/schemas/transcript.py
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+class TranscriptRead(BaseModel):
+  id: str
+  user_id: Optional[int]
+  created_at: datetime
+
+  model_config = {
+    "from_attributes": True
+  }
+
+class TranscriptMessageRead(BaseModel):
+  identity: str
+  content: str
+  created_at: datetime
+
+  model_config = {
+    "from_attributes": True
+  }
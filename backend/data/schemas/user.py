@@ -1,5 +1,7 @@
 # data/schemas/user.py
 
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr
 
 class UserCreate(BaseModel):
@@ -16,3 +18,17 @@ class UserRead(BaseModel):
   model_config = {
     "from_attributes": True
   }
+
+class UserImportError(BaseModel):
+  row: int
+  username: Optional[str] = None
+  error: str
+
+class UserImportReport(BaseModel):
+  total: int
+  created: int
+  failed: int
+  seconds: float
+  rows_per_second: float
+  errors: list[UserImportError]
+  errors_truncated: bool = False
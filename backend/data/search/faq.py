@@ -1,16 +1,44 @@
 # data/search/faq.py
 
+import logging
 import os
+from itertools import islice
+import numpy as np
 from pydantic import BaseModel
-from typing import List
-from pymongo.operations import SearchIndexModel
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from pymongo.operations import SearchIndexModel, UpdateOne
 
-from models.embedding import embed_text, embed_texts
+from models.embedding import embed_text, embed_texts, embed_texts_array
 from data.search.client import get_mongo_client
+from data.search.local_index import get_local_faq_index
+from data.search.vectors import VECTOR_DIMENSIONS, encode_vector, reduce_dimensions, stored_dimensions
+
+logger = logging.getLogger(__name__)
+
+# Name of the vector search index on the 'faqs' collection
+INDEX_NAME = "question_vector_index"
+
+# Metadata fields that can be used to pre-filter vector search
+FILTER_FIELDS = ("category", "locale", "version")
+
+# Candidates scanned per requested result – override via env var
+NUM_CANDIDATES_FACTOR: int = int(os.getenv("FAQ_NUM_CANDIDATES_FACTOR", "10"))
+
+# Texts per embeddings request, the API accepts at most 2048 – override via env var
+EMBED_BATCH_SIZE: int = min(int(os.getenv("FAQ_EMBED_BATCH_SIZE", "500")), 2048)
+
+# Where search_faqs scores vectors – "atlas" ($vectorSearch) or "local" (in-memory index)
+SEARCH_BACKEND: str = os.getenv("FAQ_SEARCH_BACKEND", "atlas")
 
 class FaqItem(BaseModel):
   question: str
   answer: str
+  category: Optional[str] = None
+  locale: Optional[str] = None
+  version: Optional[str] = None
+
+class ScoredFaqItem(FaqItem):
+  score: float
 
 def get_faqs_collection():
   """
@@ -20,50 +48,98 @@ def get_faqs_collection():
   db_name = os.getenv("MONGO_DB", "round-2")
   return client[db_name]["faqs"]
 
+def _batches(items: Iterable[Any], size: int = EMBED_BATCH_SIZE) -> Iterator[List[Any]]:
+  """
+  Split `items` into lists of at most `size`, without loading them all.
+  """
+  items = iter(items)
+  while batch := list(islice(items, size)):
+    yield batch
+
 def add_faq_entries_to_mongo(faq_items: List[FaqItem]):
   """
-  Adds FAQ items to MongoDB 'faqs' collection with OpenAI-generated embedding vectors in bulk.
+  Adds FAQ items to MongoDB 'faqs' collection with OpenAI-generated embedding vectors,
+  one embeddings request and one bulk insert per batch.
   """
   collection = get_faqs_collection()
 
-  questions = [item.question for item in faq_items]
-  vectors = embed_texts(questions)
-
-  docs = []
-  for item, vec in zip(faq_items, vectors):
-    docs.append({
-      "question": item.question,
-      "answer": item.answer,
-      "question_vector": vec
-    })
-
-  if docs:
+  for batch in _batches(faq_items):
+    vectors = embed_texts([item.question for item in batch])
+    docs = []
+    for item, vec in zip(batch, vectors):
+      doc = {
+        "question": item.question,
+        "answer": item.answer,
+        "question_vector": encode_vector(vec)
+      }
+      # Only store the metadata that is set, so filters skip untagged entries
+      for field in FILTER_FIELDS:
+        value = getattr(item, field, None)
+        if value is not None:
+          doc[field] = value
+      docs.append(doc)
     collection.insert_many(docs, ordered=False)
 
+  # The local index only sees new entries once it is reloaded
+  if faq_items and SEARCH_BACKEND == "local":
+    get_local_faq_index(collection, refresh=True)
+
 def create_search_index():
   """
-  Creates a vector search index on the 'question_vector' field for RAG.
+  Creates a vector search index on the 'question_vector' field for RAG,
+  with filter fields for metadata pre-filtering.
   """
   collection = get_faqs_collection()
+  definition = {
+    "fields": [
+      {
+        "type": "vector",
+        "numDimensions": stored_dimensions(),
+        "path": "question_vector",
+        "similarity": "cosine"
+      },
+      *({"type": "filter", "path": field} for field in FILTER_FIELDS)
+    ]
+  }
   index_model = SearchIndexModel(
-    definition={
-      "fields": [
-        {
-          "type": "vector",
-          "numDimensions": 1536,
-          "path": "question_vector",
-          "similarity": "cosine"
-        }
-      ]
-    },
-    name="question_vector_index",
+    definition=definition,
+    name=INDEX_NAME,
     type="vectorSearch"
   )
   try:
     collection.create_search_index(model=index_model)
   except Exception:
-    # index may already exist or fail silently
-    pass
+    # index may already exist: bring its definition up to date, or fail silently
+    try:
+      collection.update_search_index(INDEX_NAME, definition)
+    except Exception:
+      pass
+
+def reencode_faq_vectors(storage: Optional[str] = None, dimensions: Optional[int] = None) -> int:
+  """
+  Rewrite every stored FAQ vector in the given storage format.
+  Vectors are re-embedded from the question, so reduced or quantized
+  vectors can be brought back to full precision as well. Documents are
+  streamed and embedded in batches, each written with one bulk_write.
+  """
+  collection = get_faqs_collection()
+  cursor = collection.find({}, {"question": 1}, batch_size=EMBED_BATCH_SIZE)
+  updated = 0
+  for docs in _batches(cursor):
+    vectors = embed_texts([d["question"] for d in docs])
+    collection.bulk_write([
+      UpdateOne(
+        {"_id": doc["_id"]},
+        {"$set": {"question_vector": encode_vector(vec, storage=storage, dimensions=dimensions)}}
+      )
+      for doc, vec in zip(docs, vectors)
+    ], ordered=False)
+    updated += len(docs)
+    logger.info("Re-encoded %d FAQ vectors", updated)
+
+  if updated and SEARCH_BACKEND == "local":
+    get_local_faq_index(collection, refresh=True)
+  return updated
 
 def initialize_faqs_collection(default_items: List[FaqItem]) -> None:
   """
@@ -72,34 +148,73 @@ def initialize_faqs_collection(default_items: List[FaqItem]) -> None:
   collection = get_faqs_collection()
   if collection.estimated_document_count() == 0:
     add_faq_entries_to_mongo(default_items)
-    print(f"[faq.py]: Initialized faq vector database with {len(default_items)} items")
+    logger.info("Initialized faq vector database with %d items", len(default_items))
   create_search_index()
 
-def search_faqs(query: str, k: int = 5) -> List[FaqItem]:
+def _build_filter(filters: Dict[str, Any]) -> Dict[str, Any]:
+  """
+  Translate {field: value | [values]} into a $vectorSearch pre-filter.
+  """
+  clauses = []
+  for field, value in filters.items():
+    if field not in FILTER_FIELDS:
+      raise ValueError(f"Cannot filter FAQs on '{field}', expected one of {FILTER_FIELDS}")
+    if isinstance(value, (list, tuple, set)):
+      clauses.append({field: {"$in": list(value)}})
+    else:
+      clauses.append({field: {"$eq": value}})
+  return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def search_faqs(
+  query: str,
+  k: int = 5,
+  num_candidates: Optional[int] = None,
+  min_score: Optional[float] = None,
+  filters: Optional[Dict[str, Any]] = None,
+  query_vector: Optional[List[float]] = None,
+) -> List[ScoredFaqItem]:
   """
   Runs a vectorSearch aggregation against Mongo.
+  Scans `num_candidates` (default k * FAQ_NUM_CANDIDATES_FACTOR) neighbours,
+  pre-filters on metadata fields and drops hits scoring below `min_score`.
+  Pass `query_vector` to reuse an embedding computed earlier.
+  With FAQ_SEARCH_BACKEND=local the vectors are scored in-process instead.
   """
-  q_vec = embed_text(query)
+  if SEARCH_BACKEND == "local":
+    q_local = query_vector if query_vector is not None else embed_texts_array([query])[0]
+    index = get_local_faq_index(get_faqs_collection())
+    docs = index.search(q_local, k=k, min_score=min_score, filters=filters)
+    return [ScoredFaqItem(**d) for d in docs]
 
-  collection = get_faqs_collection()
-  pipeline = [
-    {
-      "$vectorSearch": {
-        "index":        "question_vector_index",
-        "path":         "question_vector",
-        "queryVector":  q_vec,
-        "numCandidates": k * 10,
-        "limit":        k
-      }
-    },
+  q_vec = query_vector if query_vector is not None else embed_text(query)
+  if VECTOR_DIMENSIONS:
+    q_vec = reduce_dimensions(np.asarray(q_vec, dtype=np.float32), VECTOR_DIMENSIONS).tolist()
+
+  vector_search: Dict[str, Any] = {
+    "index":        INDEX_NAME,
+    "path":         "question_vector",
+    "queryVector":  q_vec,
+    "numCandidates": max(num_candidates or k * NUM_CANDIDATES_FACTOR, k),
+    "limit":        k
+  }
+  if filters:
+    vector_search["filter"] = _build_filter(filters)
+
+  pipeline: List[Dict[str, Any]] = [
+    {"$vectorSearch": vector_search},
     {
       "$project": {
+        "_id":      0,
         "question": 1,
         "answer":   1,
+        **{field: 1 for field in FILTER_FIELDS},
         "score":    {"$meta": "vectorSearchScore"}
       }
     }
   ]
+  if min_score is not None:
+    pipeline.append({"$match": {"score": {"$gte": min_score}}})
 
+  collection = get_faqs_collection()
   docs = list(collection.aggregate(pipeline))
-  return [FaqItem(question=d["question"], answer=d["answer"]) for d in docs]
+  return [ScoredFaqItem(**d) for d in docs]
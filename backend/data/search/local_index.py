@@ -0,0 +1,95 @@
+# data/search/local_index.py
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from data.search.vectors import decode_vector, reduce_dimensions
+
+# Rows scored per block, bounds the float32 temporary when the matrix is int8
+_BLOCK_ROWS = 4096
+
+class LocalVectorIndex:
+  """
+  In-memory cosine search over vectors kept in their stored dtype.
+  Scores use Atlas' cosine normalization, (1 + cos) / 2, so score
+  thresholds mean the same thing for local and Atlas search.
+  """
+  def __init__(self, docs: List[Dict[str, Any]], vector_field: str = "question_vector") -> None:
+    vectors = [decode_vector(d[vector_field]) for d in docs]
+    self.docs: List[Dict[str, Any]] = [
+      {key: value for key, value in d.items() if key not in (vector_field, "_id")}
+      for d in docs
+    ]
+    if vectors:
+      self.matrix: np.ndarray = np.stack(vectors)
+    else:
+      self.matrix = np.zeros((0, 0), dtype=np.float32)
+    self.norms: np.ndarray = np.ones(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+      block = self.matrix[start:start + _BLOCK_ROWS].astype(np.float32, copy=False)
+      self.norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+    self.norms[self.norms == 0] = 1.0
+
+  @property
+  def nbytes(self) -> int:
+    return int(self.matrix.nbytes)
+
+  def _matches(self, doc: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    if not filters:
+      return True
+    for field, value in filters.items():
+      allowed = value if isinstance(value, (list, tuple, set)) else [value]
+      if doc.get(field) not in allowed:
+        return False
+    return True
+
+  def search(
+    self,
+    query_vector: List[float],
+    k: int = 5,
+    min_score: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+  ) -> List[Dict[str, Any]]:
+    """
+    Return up to k docs with their score, best first.
+    """
+    if not self.docs:
+      return []
+
+    q = reduce_dimensions(np.asarray(query_vector, dtype=np.float32), self.matrix.shape[1])
+    q = q / (np.linalg.norm(q) or 1.0)
+
+    scores = np.empty(len(self.docs), dtype=np.float32)
+    for start in range(0, len(self.docs), _BLOCK_ROWS):
+      block = self.matrix[start:start + _BLOCK_ROWS]
+      scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ q
+    scores = (1 + scores / self.norms) / 2
+
+    if filters:
+      mask = np.fromiter((self._matches(d, filters) for d in self.docs), dtype=bool, count=len(self.docs))
+      scores[~mask] = -np.inf
+
+    top = np.argsort(-scores)[:k]
+    results = []
+    for idx in top:
+      score = float(scores[idx])
+      if score == -np.inf or (min_score is not None and score < min_score):
+        break
+      results.append({**self.docs[idx], "score": score})
+    return results
+
+
+_index: Optional[LocalVectorIndex] = None
+_index_lock = threading.Lock()
+
+def get_local_faq_index(collection: Any, refresh: bool = False) -> LocalVectorIndex:
+  """
+  Load every FAQ vector from `collection` once per worker.
+  """
+  global _index
+  with _index_lock:
+    if _index is None or refresh:
+      _index = LocalVectorIndex(list(collection.find({})))
+    return _index
@@ -0,0 +1,98 @@
+# data/search/vectors.py
+
+import os
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from bson.binary import Binary
+
+# How FAQ vectors are stored in Mongo – override via env var:
+#   "array"   – BSON array of doubles (8 bytes per dimension)
+#   "float32" – BSON vector binary of float32 (4 bytes per dimension)
+#   "int8"    – BSON vector binary of scalar-quantized int8 (1 byte per dimension)
+VECTOR_STORAGE: str = os.getenv("FAQ_VECTOR_STORAGE", "array")
+
+# Keep only the first N dimensions (renormalized) – unset keeps them all
+VECTOR_DIMENSIONS: Optional[int] = int(os.getenv("FAQ_VECTOR_DIMENSIONS")) if os.getenv("FAQ_VECTOR_DIMENSIONS") else None
+
+# Full size of the embedding model output
+EMBEDDING_DIMENSIONS = 1536
+
+# BSON binary subtype 9 header bytes (dtype, padding)
+_VECTOR_SUBTYPE = 9
+_DTYPE_HEADERS = {
+  "float32": b"\x27\x00",
+  "int8": b"\x03\x00",
+}
+_HEADER_DTYPES = {
+  0x27: np.dtype("<f4"),
+  0x03: np.dtype("i1"),
+}
+
+STORAGE_KINDS = ("array", *_DTYPE_HEADERS)
+
+def stored_dimensions() -> int:
+  """
+  Number of dimensions vectors have once stored.
+  """
+  return VECTOR_DIMENSIONS or EMBEDDING_DIMENSIONS
+
+def reduce_dimensions(vec: np.ndarray, dimensions: Optional[int]) -> np.ndarray:
+  """
+  Truncate to the first `dimensions` components and L2-renormalize.
+  """
+  if not dimensions or dimensions >= vec.shape[-1]:
+    return vec
+  reduced = vec[..., :dimensions]
+  norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+  return reduced / np.where(norms == 0, 1, norms)
+
+def quantize_int8(vec: np.ndarray) -> np.ndarray:
+  """
+  Symmetric per-vector scalar quantization to int8.
+  The scale is not stored: cosine similarity does not depend on it.
+  """
+  peak = float(np.max(np.abs(vec))) or 1.0
+  return np.round(vec * (127.0 / peak)).astype(np.int8)
+
+def encode_vector(
+  vec: Sequence[float],
+  storage: Optional[str] = None,
+  dimensions: Optional[int] = None,
+) -> Any:
+  """
+  Convert an embedding into the value stored in Mongo for `storage`.
+  """
+  storage = storage or VECTOR_STORAGE
+  if storage not in STORAGE_KINDS:
+    raise ValueError(f"Unknown vector storage '{storage}', expected one of {STORAGE_KINDS}")
+
+  arr = reduce_dimensions(np.asarray(vec, dtype=np.float32), dimensions or VECTOR_DIMENSIONS)
+  if storage == "array":
+    return arr.tolist()
+  if storage == "int8":
+    arr = quantize_int8(arr)
+  else:
+    arr = arr.astype("<f4", copy=False)
+  return Binary(_DTYPE_HEADERS[storage] + arr.tobytes(), subtype=_VECTOR_SUBTYPE)
+
+def decode_vector(value: Any) -> np.ndarray:
+  """
+  View a stored vector as a NumPy array. Binary vectors are not copied.
+  """
+  if isinstance(value, Binary) and value.subtype == _VECTOR_SUBTYPE:
+    dtype = _HEADER_DTYPES.get(value[0])
+    if dtype is None:
+      raise ValueError(f"Unsupported vector dtype 0x{value[0]:02x}")
+    return np.frombuffer(value, dtype=dtype, offset=2)
+  return np.asarray(value, dtype=np.float32)
+
+def vector_nbytes(value: Any) -> int:
+  """
+  BSON size of a stored vector value, excluding its field name.
+  """
+  if isinstance(value, Binary):
+    # int32 length + subtype byte + payload
+    return 5 + len(value)
+  # int32 length + per element (type byte, index key, NUL, double) + trailing NUL
+  return 5 + sum(1 + len(str(i)) + 1 + 8 for i in range(len(value)))
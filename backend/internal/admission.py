@@ -0,0 +1,209 @@
+# internal/admission.py
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from internal.metrics import registry
+from internal.rate import TokenBucket
+
+# Limits – override via env vars
+CHAT_MAX_INFLIGHT: int = int(os.getenv("CHAT_MAX_INFLIGHT", "8"))
+CHAT_MAX_INFLIGHT_PER_USER: int = int(os.getenv("CHAT_MAX_INFLIGHT_PER_USER", "1"))
+CHAT_MAX_QUEUE: int = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+CHAT_QUEUE_TIMEOUT: float = float(os.getenv("CHAT_QUEUE_TIMEOUT", "15"))
+CHAT_PROMPT_RATE: float = float(os.getenv("CHAT_PROMPT_RATE", "0.5"))
+CHAT_PROMPT_BURST: int = int(os.getenv("CHAT_PROMPT_BURST", "3"))
+
+# Metrics
+inflight_gauge = registry.gauge("chat_turns_inflight", "Chat turns currently running")
+queue_depth_gauge = registry.gauge("chat_queue_depth", "Chat turns waiting for a slot")
+admitted_counter = registry.counter("chat_turns_admitted_total", "Chat turns that got a slot")
+rejected_counter = registry.counter("chat_turns_rejected_total", "Chat turns rejected by admission control")
+queue_wait_histogram = registry.histogram("chat_queue_wait_seconds", "Time chat turns spent queued")
+
+
+class AdmissionRejected(Exception):
+  """
+  Raised when a chat turn cannot be admitted.
+  """
+  def __init__(self, reason: str, retry_after: float = 0.0) -> None:
+    super().__init__(reason)
+    self.reason = reason
+    self.retry_after = retry_after
+
+
+class AdmissionController:
+  """
+  Bounds global and per-user in-flight turns, queueing the excess with a
+  bounded depth and timeout. Queued turns are granted round-robin across
+  users so one busy user cannot starve the others.
+  """
+  def __init__(
+    self,
+    max_inflight: int,
+    max_inflight_per_user: int,
+    max_queue: int,
+    queue_timeout: float,
+  ) -> None:
+    self.max_inflight = max_inflight
+    self.max_inflight_per_user = max_inflight_per_user
+    self.max_queue = max_queue
+    self.queue_timeout = queue_timeout
+
+    self._inflight = 0
+    self._inflight_by_user: dict[str, int] = {}
+    self._waiters: "OrderedDict[str, deque[asyncio.Future]]" = OrderedDict()
+    self._queued = 0
+
+  @property
+  def queue_depth(self) -> int:
+    return self._queued
+
+  @property
+  def inflight(self) -> int:
+    return self._inflight
+
+  def _can_run(self, user_key: str) -> bool:
+    return (
+      self._inflight < self.max_inflight
+      and self._inflight_by_user.get(user_key, 0) < self.max_inflight_per_user
+    )
+
+  def _grant(self, user_key: str) -> None:
+    self._inflight += 1
+    self._inflight_by_user[user_key] = self._inflight_by_user.get(user_key, 0) + 1
+    inflight_gauge.set(self._inflight)
+
+  def _remove_waiter(self, user_key: str, fut: asyncio.Future) -> None:
+    queue = self._waiters.get(user_key)
+    if queue is None or fut not in queue:
+      return
+    queue.remove(fut)
+    self._queued -= 1
+    if not queue:
+      del self._waiters[user_key]
+    queue_depth_gauge.set(self._queued)
+
+  def _dispatch(self) -> None:
+    """
+    Hand free slots to queued turns, one user at a time in rotation.
+    """
+    progressed = True
+    while progressed and self._inflight < self.max_inflight and self._waiters:
+      progressed = False
+      for user_key in list(self._waiters.keys()):
+        if not self._can_run(user_key):
+          continue
+        queue = self._waiters[user_key]
+        fut = queue.popleft()
+        self._queued -= 1
+        if queue:
+          self._waiters.move_to_end(user_key)
+        else:
+          del self._waiters[user_key]
+        if fut.done():
+          progressed = True
+          break
+        self._grant(user_key)
+        fut.set_result(True)
+        progressed = True
+        break
+    queue_depth_gauge.set(self._queued)
+
+  async def acquire(self, user_key: str) -> None:
+    """
+    Wait for a slot for `user_key` or raise AdmissionRejected.
+    """
+    if not self._waiters and self._can_run(user_key):
+      self._grant(user_key)
+      admitted_counter.inc()
+      queue_wait_histogram.observe(0.0)
+      return
+
+    if self._queued >= self.max_queue:
+      rejected_counter.inc(reason="queue_full")
+      raise AdmissionRejected("queue_full", retry_after=self.queue_timeout)
+
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    self._waiters.setdefault(user_key, deque()).append(fut)
+    self._queued += 1
+    queue_depth_gauge.set(self._queued)
+    self._dispatch()
+
+    started = time.monotonic()
+    try:
+      await asyncio.wait({fut}, timeout=self.queue_timeout)
+    except asyncio.CancelledError:
+      if fut.done() and not fut.cancelled():
+        self.release(user_key)
+      else:
+        fut.cancel()
+        self._remove_waiter(user_key, fut)
+      raise
+
+    if not fut.done():
+      fut.cancel()
+      self._remove_waiter(user_key, fut)
+      rejected_counter.inc(reason="timeout")
+      raise AdmissionRejected("timeout", retry_after=self.queue_timeout)
+
+    admitted_counter.inc()
+    queue_wait_histogram.observe(time.monotonic() - started)
+
+  def release(self, user_key: str) -> None:
+    """
+    Give back a slot previously obtained through acquire().
+    """
+    self._inflight -= 1
+    remaining = self._inflight_by_user.get(user_key, 1) - 1
+    if remaining > 0:
+      self._inflight_by_user[user_key] = remaining
+    else:
+      self._inflight_by_user.pop(user_key, None)
+    inflight_gauge.set(self._inflight)
+    self._dispatch()
+
+  @asynccontextmanager
+  async def slot(self, user_key: str) -> AsyncIterator[None]:
+    """
+    Hold a turn slot for the duration of the block.
+    """
+    await self.acquire(user_key)
+    try:
+      yield
+    finally:
+      self.release(user_key)
+
+
+# Shared controller for chat turns
+chat_admission = AdmissionController(
+  max_inflight=CHAT_MAX_INFLIGHT,
+  max_inflight_per_user=CHAT_MAX_INFLIGHT_PER_USER,
+  max_queue=CHAT_MAX_QUEUE,
+  queue_timeout=CHAT_QUEUE_TIMEOUT,
+)
+
+# Agent turns take seconds, so they get their own threads, one per slot.
+# The default executor stays free for short blocking calls like logins,
+# token lookups and transcript writes.
+turn_executor = ThreadPoolExecutor(max_workers=CHAT_MAX_INFLIGHT, thread_name_prefix="chat-turn")
+
+async def run_turn(func: Callable[..., Any], *args: Any) -> Any:
+  """
+  Run a blocking chat turn on the turn executor.
+  """
+  return await asyncio.get_running_loop().run_in_executor(turn_executor, func, *args)
+
+def new_prompt_bucket(rate: Optional[float] = None, burst: Optional[int] = None) -> TokenBucket:
+  """
+  Build a per-socket prompt rate limiter with the configured defaults.
+  """
+  return TokenBucket(
+    rate=CHAT_PROMPT_RATE if rate is None else rate,
+    burst=CHAT_PROMPT_BURST if burst is None else burst,
+  )
@@ -50,4 +50,17 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     if user is None:
       raise credentials_exception
     return user
-  
\ No newline at end of file
+
+# Usernames allowed to use admin endpoints – override via env var
+ADMIN_USERNAMES: set[str] = set(filter(None, os.getenv("ADMIN_USERNAMES", "root").split(",")))
+
+def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+  """
+  Dependency that only lets admin users through.
+  """
+  if current_user.username not in ADMIN_USERNAMES:
+    raise HTTPException(
+      status_code=status.HTTP_403_FORBIDDEN,
+      detail="Admin privileges required",
+    )
+  return current_user
@@ -0,0 +1,236 @@
+# internal/log.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import numbers
+import os
+import queue
+import random
+import reprlib
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from internal.metrics import registry
+from internal.rate import TokenBucket
+
+# Settings – override via env vars
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_FIELD_CHARS: int = int(os.getenv("LOG_MAX_FIELD_CHARS", "200"))
+# Comma separated "<logger>=<value>" lists, e.g. "models.action=0.1".
+# Both are opt-in: tool-call lines double as an audit trail
+LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
+LOG_RATE_LIMITS: str = os.getenv("LOG_RATE_LIMITS", "")
+
+# Metrics
+dropped_counter = registry.counter("log_records_dropped_total", "Log records dropped before they were written")
+
+# Attributes every LogRecord has, anything else came in through `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _parse_settings(raw: str) -> dict[str, float]:
+  settings: dict[str, float] = {}
+  for item in raw.split(","):
+    name, sep, value = item.partition("=")
+    if sep and name.strip():
+      settings[name.strip()] = float(value)
+  return settings
+
+
+def _closest(settings: dict[str, Any], name: str) -> Optional[str]:
+  """
+  The most specific configured logger name that `name` falls under.
+  """
+  while name:
+    if name in settings:
+      return name
+    name = name.rpartition(".")[0]
+  return None
+
+
+class _Truncator(reprlib.Repr):
+  """
+  Bounded text for log arguments, so large payloads are cut down before
+  they are queued instead of being formatted in full. Prints what %s
+  would, str() for objects and repr() for containers, up to max_chars.
+  """
+  def __init__(self, max_chars: int) -> None:
+    super().__init__()
+    self.max_chars = max_chars
+    self.maxstring = max_chars
+    self.maxother = max_chars
+    # Every item takes at least a character, so only max_chars cuts
+    self.maxdict = self.maxlist = self.maxtuple = max_chars
+    self.maxset = self.maxfrozenset = self.maxdeque = max_chars
+
+  def cut(self, text: str) -> str:
+    return text if len(text) <= self.max_chars else f"{text[:self.max_chars]}...[{len(text)} chars]"
+
+  def short(self, value: Any) -> Any:
+    if value is None or isinstance(value, numbers.Number):
+      return value
+    if isinstance(value, (dict, list, tuple, set, frozenset, deque)):
+      text = self.repr(value)
+      return text if len(text) <= self.max_chars else f"{text[:self.max_chars]}...[{len(value)} items]"
+    return self.cut(value if isinstance(value, str) else str(value))
+
+  def short_field(self, value: Any) -> Any:
+    """
+    Fields passed through `extra` keep their type unless their text is
+    too long, so the JSON output still shows them as they were.
+    """
+    if value is None or isinstance(value, (str, numbers.Number)):
+      return self.short(value)
+    text = self.short(value)
+    return value if len(text) <= self.max_chars else text
+
+
+class ThrottleFilter(logging.Filter):
+  """
+  Per-logger sampling and rate limits for records below WARNING.
+  Warnings and errors are always kept.
+  """
+  def __init__(self, sampling: dict[str, float], rate_limits: dict[str, float]) -> None:
+    super().__init__()
+    self.sampling = sampling
+    self.rate_limits = rate_limits
+    self._buckets: dict[str, TokenBucket] = {}
+    self._lock = threading.Lock()
+
+  def filter(self, record: logging.LogRecord) -> bool:
+    if record.levelno >= logging.WARNING:
+      return True
+
+    sampled = _closest(self.sampling, record.name)
+    if sampled is not None and random.random() >= self.sampling[sampled]:
+      dropped_counter.inc(logger=sampled, reason="sampled")
+      return False
+
+    limited = _closest(self.rate_limits, record.name)
+    if limited is not None:
+      with self._lock:
+        bucket = self._buckets.get(limited)
+        if bucket is None:
+          rate = self.rate_limits[limited]
+          bucket = self._buckets[limited] = TokenBucket(rate, max(int(rate), 1))
+        allowed = bucket.try_acquire()
+      if not allowed:
+        dropped_counter.inc(logger=limited, reason="rate_limited")
+        return False
+    return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+  """
+  Queue handler that only truncates the arguments and extra fields on the
+  calling thread;
+  formatting and I/O happen on the listener thread. Records are dropped
+  instead of blocking when the queue is full.
+  """
+  def __init__(
+    self,
+    log_queue: queue.SimpleQueue,
+    max_size: int = LOG_QUEUE_SIZE,
+    max_field_chars: int = LOG_MAX_FIELD_CHARS,
+  ) -> None:
+    super().__init__(log_queue)
+    self.max_size = max_size
+    self.truncator = _Truncator(max_field_chars)
+
+  def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+    if isinstance(record.args, dict):
+      record.args = {k: self.truncator.short(v) for k, v in record.args.items()}
+    elif record.args:
+      record.args = tuple(self.truncator.short(arg) for arg in record.args)
+    for key, value in list(vars(record).items()):
+      if key not in _RECORD_FIELDS:
+        setattr(record, key, self.truncator.short_field(value))
+    if record.exc_info and not record.exc_text:
+      record.exc_text = logging.Formatter().formatException(record.exc_info)
+    record.exc_info = None
+    return record
+
+  def enqueue(self, record: logging.LogRecord) -> None:
+    # SimpleQueue is unbounded but much cheaper to put on, so bound it here
+    if self.queue.qsize() >= self.max_size:
+      dropped_counter.inc(logger=record.name, reason="queue_full")
+      return
+    self.queue.put_nowait(record)
+
+
+class JsonFormatter(logging.Formatter):
+  """
+  One JSON object per line with the fields passed through `extra`.
+  """
+  def format(self, record: logging.LogRecord) -> str:
+    entry: dict[str, Any] = {
+      "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+      "level": record.levelname,
+      "logger": record.name,
+      "msg": record.getMessage(),
+    }
+    for key, value in vars(record).items():
+      if key not in _RECORD_FIELDS:
+        entry[key] = value
+    if record.exc_text:
+      entry["exc"] = record.exc_text
+    return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+  stream: Any = None,
+  sampling: Optional[str] = None,
+  rate_limits: Optional[str] = None,
+) -> None:
+  """
+  Route every log record through a bounded queue to a single writer
+  thread. `sampling` and `rate_limits` override the env settings. Safe
+  to call more than once.
+  """
+  global _listener
+  if _listener is not None:
+    return
+
+  output = logging.StreamHandler(stream or sys.stderr)
+  if LOG_FORMAT == "json":
+    output.setFormatter(JsonFormatter())
+  else:
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+  log_queue: queue.SimpleQueue = queue.SimpleQueue()
+  handler = NonBlockingQueueHandler(log_queue)
+  sampling_settings = _parse_settings(LOG_SAMPLING if sampling is None else sampling)
+  rate_settings = _parse_settings(LOG_RATE_LIMITS if rate_limits is None else rate_limits)
+  if sampling_settings or rate_settings:
+    handler.addFilter(ThrottleFilter(sampling_settings, rate_settings))
+
+  root = logging.getLogger()
+  for existing in list(root.handlers):
+    root.removeHandler(existing)
+  root.addHandler(handler)
+  root.setLevel(LOG_LEVEL)
+
+  _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+  _listener.start()
+  atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+  """
+  Write out the queued records and stop the writer thread.
+  """
+  global _listener
+  if _listener is None:
+    return
+  _listener.stop()
+  _listener = None
@@ -0,0 +1,242 @@
+# internal/login_throttle.py
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from internal.metrics import registry
+from internal.rate import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Limits – override via env vars
+LOGIN_THROTTLE: bool = os.getenv("LOGIN_THROTTLE", "on") != "off"
+LOGIN_USER_RATE: float = float(os.getenv("LOGIN_USER_RATE", "0.2"))
+LOGIN_USER_BURST: int = int(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_IP_RATE: float = float(os.getenv("LOGIN_IP_RATE", "1"))
+LOGIN_IP_BURST: int = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_FREE_FAILURES: int = int(os.getenv("LOGIN_FREE_FAILURES", "3"))
+LOGIN_BACKOFF_BASE: float = float(os.getenv("LOGIN_BACKOFF_BASE", "1"))
+LOGIN_BACKOFF_MAX: float = float(os.getenv("LOGIN_BACKOFF_MAX", "300"))
+LOGIN_FAILURE_WINDOW: float = float(os.getenv("LOGIN_FAILURE_WINDOW", "900"))
+LOGIN_RESERVED_VERIFICATIONS: int = int(os.getenv("LOGIN_RESERVED_VERIFICATIONS", "1"))
+# Half the CPUs, but always at least one slot beyond the reserved ones
+LOGIN_MAX_VERIFICATIONS: int = int(os.getenv(
+  "LOGIN_MAX_VERIFICATIONS", str(max((os.cpu_count() or 2) // 2, LOGIN_RESERVED_VERIFICATIONS + 1))
+))
+LOGIN_VERIFY_TIMEOUT: float = float(os.getenv("LOGIN_VERIFY_TIMEOUT", "2"))
+LOGIN_MAX_TRACKED: int = int(os.getenv("LOGIN_MAX_TRACKED", "100000"))
+
+# Metrics
+attempts_counter = registry.counter("login_attempts_total", "Login attempts by outcome")
+throttled_counter = registry.counter("login_throttled_total", "Login attempts refused before verification")
+verifications_gauge = registry.gauge("login_verifications_inflight", "Password verifications currently running")
+verify_wait_histogram = registry.histogram("login_verify_wait_seconds", "Time logins waited for a verification slot")
+
+
+class LoginThrottled(Exception):
+  """
+  Raised when a login attempt is refused before its password is checked.
+  """
+  def __init__(self, reason: str, retry_after: float = 0.0) -> None:
+    super().__init__(reason)
+    self.reason = reason
+    self.retry_after = retry_after
+
+
+class _Failures:
+  __slots__ = ("count", "blocked_until", "last_failed")
+
+  def __init__(self) -> None:
+    self.count = 0
+    self.blocked_until = 0.0
+    self.last_failed = 0.0
+
+  def expired(self, now: float) -> bool:
+    """
+    Whether the failures are older than the window, counted from the end
+    of the last backoff so a long block is not forgotten while it runs.
+    """
+    return now - max(self.last_failed, self.blocked_until) > LOGIN_FAILURE_WINDOW
+
+
+class _BoundedMap(OrderedDict):
+  """
+  Least recently used entries are evicted past `max_size`, so a flood of
+  random usernames cannot grow memory without bound.
+  """
+  def __init__(self, max_size: int) -> None:
+    super().__init__()
+    self.max_size = max_size
+
+  def touch(self, key: str, factory: Callable[[], Any]) -> Any:
+    value = self.get(key)
+    if value is None:
+      value = self[key] = factory()
+      while len(self) > self.max_size:
+        self.popitem(last=False)
+    else:
+      self.move_to_end(key)
+    return value
+
+
+class LoginThrottle:
+  """
+  Guards password verification, which is deliberately expensive:
+  - a token bucket per client IP,
+  - a token bucket per username, drained by failed attempts only and
+    enforced only against clients with recent failures, so guessing a
+    known username from elsewhere cannot lock its owner out,
+  - exponential backoff per IP and per username+IP after repeated failures,
+    forgotten LOGIN_FAILURE_WINDOW seconds after the last one or the end
+    of the last block,
+  - a global cap on concurrent verifications, with slots reserved for
+    clients without recent failures so an attack cannot starve them.
+  Runs on the event loop only, like the chat admission controller.
+  """
+  def __init__(
+    self,
+    max_verifications: int = LOGIN_MAX_VERIFICATIONS,
+    reserved_verifications: int = LOGIN_RESERVED_VERIFICATIONS,
+    verify_timeout: float = LOGIN_VERIFY_TIMEOUT,
+    max_tracked: int = LOGIN_MAX_TRACKED,
+  ) -> None:
+    self.enabled = LOGIN_THROTTLE
+    self.verify_timeout = verify_timeout
+    self._buckets = _BoundedMap(max_tracked)
+    self._failures = _BoundedMap(max_tracked)
+    if max_verifications <= reserved_verifications:
+      logger.warning(
+        "Login throttle has %d verification slots and reserves %d, clients with failures share the same slots",
+        max_verifications, reserved_verifications,
+      )
+    self._all_slots = asyncio.Semaphore(max_verifications)
+    self._suspect_slots = asyncio.Semaphore(max(max_verifications - reserved_verifications, 1))
+    self._inflight = 0
+
+  def _keys(self, username: str, ip: str) -> tuple[str, str, str]:
+    user = username.strip().lower()
+    return f"user:{user}", f"ip:{ip}", f"pair:{user}@{ip}"
+
+  def _bucket(self, key: str, rate: float, burst: int) -> TokenBucket:
+    return self._buckets.touch(key, lambda: TokenBucket(rate, burst))
+
+  def _recent_failures(self, key: str, now: float) -> Optional[_Failures]:
+    failures = self._failures.get(key)
+    if failures is not None and failures.expired(now):
+      del self._failures[key]
+      return None
+    return failures
+
+  def _blocked_for(self, key: str, now: float) -> float:
+    failures = self._recent_failures(key, now)
+    return max(failures.blocked_until - now, 0.0) if failures else 0.0
+
+  def is_suspect(self, username: str, ip: str) -> bool:
+    """
+    Whether the client or account pair failed to log in recently.
+    """
+    now = time.monotonic()
+    _, ip_key, pair_key = self._keys(username, ip)
+    return any(self._recent_failures(key, now) is not None for key in (ip_key, pair_key))
+
+  def check(self, username: str, ip: str) -> None:
+    """
+    Raise LoginThrottled if this attempt may not be verified right now.
+    """
+    if not self.enabled:
+      return
+    user_key, ip_key, pair_key = self._keys(username, ip)
+
+    # Backoff first, so blocked clients do not drain the buckets
+    now = time.monotonic()
+    blocked = max(self._blocked_for(ip_key, now), self._blocked_for(pair_key, now))
+    if blocked > 0:
+      self._reject("backoff", blocked)
+
+    ip_bucket = self._bucket(ip_key, LOGIN_IP_RATE, LOGIN_IP_BURST)
+    if not ip_bucket.try_acquire():
+      self._reject("ip_rate", ip_bucket.retry_after())
+    if self.is_suspect(username, ip):
+      # Only failures take tokens, see record_failure
+      user_bucket = self._bucket(user_key, LOGIN_USER_RATE, LOGIN_USER_BURST)
+      retry_after = user_bucket.retry_after()
+      if retry_after > 0:
+        self._reject("user_rate", retry_after)
+
+  def _reject(self, reason: str, retry_after: float) -> None:
+    throttled_counter.inc(reason=reason)
+    attempts_counter.inc(outcome="throttled")
+    raise LoginThrottled(reason, retry_after=retry_after)
+
+  def record_failure(self, username: str, ip: str) -> None:
+    attempts_counter.inc(outcome="failure")
+    if not self.enabled:
+      return
+    now = time.monotonic()
+    user_key, ip_key, pair_key = self._keys(username, ip)
+    self._bucket(user_key, LOGIN_USER_RATE, LOGIN_USER_BURST).try_acquire()
+    for key in (ip_key, pair_key):
+      # Start over once the earlier failures are out of the window
+      self._recent_failures(key, now)
+      failures: _Failures = self._failures.touch(key, _Failures)
+      failures.count += 1
+      failures.last_failed = now
+      excess = failures.count - LOGIN_FREE_FAILURES
+      if excess > 0:
+        delay = min(LOGIN_BACKOFF_BASE * 2 ** (excess - 1), LOGIN_BACKOFF_MAX)
+        failures.blocked_until = now + delay
+
+  def record_success(self, username: str, ip: str) -> None:
+    attempts_counter.inc(outcome="success")
+    # Only the pair: one valid account must not clear the backoff of its IP
+    _, _, pair_key = self._keys(username, ip)
+    self._failures.pop(pair_key, None)
+
+  @asynccontextmanager
+  async def verification_slot(self, username: str, ip: str) -> AsyncIterator[None]:
+    """
+    Hold one of the limited verification slots while checking a password.
+    Clients with recent failures cannot use the reserved slots.
+    """
+    if not self.enabled:
+      yield
+      return
+
+    semaphores = [self._all_slots]
+    if self.is_suspect(username, ip):
+      semaphores.insert(0, self._suspect_slots)
+
+    started = time.monotonic()
+    acquired: list[asyncio.Semaphore] = []
+    try:
+      async with asyncio.timeout(self.verify_timeout):
+        for semaphore in semaphores:
+          await semaphore.acquire()
+          acquired.append(semaphore)
+    except BaseException as e:
+      # Timed out or cancelled while waiting, give back what we already hold
+      for semaphore in acquired:
+        semaphore.release()
+      if isinstance(e, TimeoutError):
+        self._reject("busy", self.verify_timeout)
+      raise
+    verify_wait_histogram.observe(time.monotonic() - started)
+
+    self._inflight += 1
+    verifications_gauge.set(self._inflight)
+    try:
+      yield
+    finally:
+      self._inflight -= 1
+      verifications_gauge.set(self._inflight)
+      for semaphore in acquired:
+        semaphore.release()
+
+
+# Shared throttle for /auth/login
+login_throttle = LoginThrottle()
@@ -0,0 +1,160 @@
+# internal/metrics.py
+
+import threading
+from bisect import bisect_left
+from typing import Any, Iterable, Optional
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS: tuple[float, ...] = (
+  0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+  return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _label_str(key: LabelKey) -> str:
+  return ",".join(f"{k}={v}" for k, v in key)
+
+
+class Counter:
+  """
+  Monotonically increasing value, optionally split by labels.
+  """
+  def __init__(self, name: str, description: str) -> None:
+    self.name = name
+    self.description = description
+    self._values: dict[LabelKey, float] = {}
+    self._lock = threading.Lock()
+
+  def inc(self, amount: float = 1, **labels: Any) -> None:
+    key = _label_key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+  def value(self, **labels: Any) -> float:
+    return self._values.get(_label_key(labels), 0)
+
+  def snapshot(self) -> dict[str, Any]:
+    with self._lock:
+      return {_label_str(k): v for k, v in self._values.items()}
+
+
+class Gauge:
+  """
+  Value that can go up and down, optionally split by labels.
+  """
+  def __init__(self, name: str, description: str) -> None:
+    self.name = name
+    self.description = description
+    self._values: dict[LabelKey, float] = {}
+    self._lock = threading.Lock()
+
+  def set(self, value: float, **labels: Any) -> None:
+    with self._lock:
+      self._values[_label_key(labels)] = value
+
+  def inc(self, amount: float = 1, **labels: Any) -> None:
+    key = _label_key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+  def dec(self, amount: float = 1, **labels: Any) -> None:
+    self.inc(-amount, **labels)
+
+  def value(self, **labels: Any) -> float:
+    return self._values.get(_label_key(labels), 0)
+
+  def snapshot(self) -> dict[str, Any]:
+    with self._lock:
+      return {_label_str(k): v for k, v in self._values.items()}
+
+
+class Histogram:
+  """
+  Bucketed distribution of observed values, optionally split by labels.
+  """
+  def __init__(self, name: str, description: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+    self.name = name
+    self.description = description
+    self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+    self._series: dict[LabelKey, dict[str, Any]] = {}
+    self._lock = threading.Lock()
+
+  def observe(self, value: float, **labels: Any) -> None:
+    key = _label_key(labels)
+    idx = bisect_left(self.buckets, value)
+    with self._lock:
+      series = self._series.get(key)
+      if series is None:
+        series = {"counts": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0, "max": 0.0}
+        self._series[key] = series
+      series["counts"][idx] += 1
+      series["count"] += 1
+      series["sum"] += value
+      series["max"] = max(series["max"], value)
+
+  def snapshot(self) -> dict[str, Any]:
+    with self._lock:
+      result: dict[str, Any] = {}
+      for key, series in self._series.items():
+        cumulative = 0
+        buckets: dict[str, int] = {}
+        for bound, count in zip(list(self.buckets) + [float("inf")], series["counts"]):
+          cumulative += count
+          buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        result[_label_str(key)] = {
+          "count": series["count"],
+          "sum": series["sum"],
+          "max": series["max"],
+          "buckets": buckets,
+        }
+      return result
+
+
+class MetricsRegistry:
+  """
+  Process-wide collection of named metrics.
+  """
+  def __init__(self) -> None:
+    self._metrics: dict[str, Any] = {}
+    self._lock = threading.Lock()
+
+  def _get_or_create(self, cls: type, name: str, description: str, **kwargs: Any) -> Any:
+    with self._lock:
+      metric = self._metrics.get(name)
+      if metric is None:
+        metric = cls(name, description, **kwargs)
+        self._metrics[name] = metric
+      elif not isinstance(metric, cls):
+        raise ValueError(f"Metric {name} already registered as {type(metric).__name__}")
+      return metric
+
+  def counter(self, name: str, description: str = "") -> Counter:
+    return self._get_or_create(Counter, name, description)
+
+  def gauge(self, name: str, description: str = "") -> Gauge:
+    return self._get_or_create(Gauge, name, description)
+
+  def histogram(self, name: str, description: str = "", buckets: Optional[Iterable[float]] = None) -> Histogram:
+    return self._get_or_create(Histogram, name, description, buckets=buckets or DEFAULT_BUCKETS)
+
+  def snapshot(self) -> dict[str, Any]:
+    """
+    Return every metric as a JSON-serializable dict.
+    """
+    with self._lock:
+      metrics = dict(self._metrics)
+    return {
+      name: {
+        "type": type(metric).__name__.lower(),
+        "description": metric.description,
+        "values": metric.snapshot(),
+      }
+      for name, metric in sorted(metrics.items())
+    }
+
+
+# Shared registry for the whole backend
+registry = MetricsRegistry()
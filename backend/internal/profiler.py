@@ -0,0 +1,239 @@
+# internal/profiler.py
+
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+# Only stacks that pass through the backend's own code are kept
+APP_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Upper bound for any profiling session, in seconds
+MAX_SESSION_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+
+PROFILE_MODES = ("requests", "turns", "duration")
+
+Frame = tuple[str, str, int]
+
+
+def _is_app_file(filename: str) -> bool:
+  return filename.startswith(APP_ROOT) and "site-packages" not in filename
+
+
+def _frame_label(frame: Frame) -> str:
+  name, filename, line = frame
+  if _is_app_file(filename):
+    filename = os.path.relpath(filename, APP_ROOT)
+  else:
+    filename = os.path.basename(filename)
+  return f"{name} ({filename}:{line})"
+
+
+class ProfileSession:
+  """
+  One sampling run: for the next `count` requests or chat turns, or for
+  `seconds` seconds. Samples are only taken while a tracked unit is in
+  flight, except in duration mode.
+  """
+  def __init__(self, mode: str, count: int = 1, seconds: float = 10.0, interval: float = 0.005) -> None:
+    if mode not in PROFILE_MODES:
+      raise ValueError(f"Unknown profiling mode '{mode}', expected one of {PROFILE_MODES}")
+    self.mode = mode
+    self.count = max(count, 1)
+    self.interval = max(interval, 0.001)
+    self.started = time.monotonic()
+    self.deadline = self.started + min(seconds if mode == "duration" else MAX_SESSION_SECONDS, MAX_SESSION_SECONDS)
+    self.finished: Optional[float] = None
+    self.completed = 0
+    self.samples = 0
+    self.stacks: StackCounter = StackCounter()
+
+  @property
+  def done(self) -> bool:
+    return self.finished is not None
+
+  def status(self) -> dict[str, Any]:
+    end = self.finished or time.monotonic()
+    return {
+      "mode": self.mode,
+      "count": self.count,
+      "completed": self.completed,
+      "samples": self.samples,
+      "interval_ms": self.interval * 1000,
+      "elapsed_seconds": round(end - self.started, 3),
+      "done": self.done,
+    }
+
+  def collapsed(self) -> str:
+    """
+    Brendan Gregg collapsed-stack format, one 'a;b;c count' line per stack.
+    """
+    lines = []
+    # list() copies in one step, so a running sampler cannot break iteration
+    for (thread, stack), count in sorted(list(self.stacks.items()), key=lambda kv: -kv[1]):
+      labels = [thread] + [_frame_label(f).replace(";", ":") for f in stack]
+      lines.append(f"{';'.join(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+  def speedscope(self) -> dict[str, Any]:
+    """
+    Speedscope 'sampled' profile with one profile per thread.
+    """
+    frames: list[dict[str, Any]] = []
+    frame_index: dict[Any, int] = {}
+
+    def index_of(key: Any, name: str, file: Optional[str] = None, line: Optional[int] = None) -> int:
+      if key not in frame_index:
+        frame_index[key] = len(frames)
+        entry: dict[str, Any] = {"name": name}
+        if file is not None:
+          entry["file"] = file
+          entry["line"] = line
+        frames.append(entry)
+      return frame_index[key]
+
+    by_thread: dict[str, tuple[list[list[int]], list[float]]] = {}
+    for (thread, stack), count in list(self.stacks.items()):
+      samples, weights = by_thread.setdefault(thread, ([], []))
+      samples.append([index_of(f, f[0], f[1], f[2]) for f in stack])
+      weights.append(count * self.interval)
+
+    profiles = []
+    for thread, (samples, weights) in sorted(by_thread.items()):
+      profiles.append({
+        "type": "sampled",
+        "name": thread,
+        "unit": "seconds",
+        "startValue": 0,
+        "endValue": sum(weights),
+        "samples": samples,
+        "weights": weights,
+      })
+
+    return {
+      "$schema": "https://www.speedscope.app/file-format-schema.json",
+      "shared": {"frames": frames},
+      "profiles": profiles,
+      "name": f"round-2 {self.mode} profile",
+      "exporter": "round-2 internal/profiler.py",
+    }
+
+
+class SamplingProfiler:
+  """
+  Wall-clock sampling profiler over every thread of the process. It costs
+  a single attribute check per tracked unit while no session is running.
+  """
+  def __init__(self) -> None:
+    self.active = False
+    self.session: Optional[ProfileSession] = None
+    self._inflight = 0
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+
+  def start(self, session: ProfileSession) -> ProfileSession:
+    """
+    Begin a session, replacing the result of any previous one.
+    """
+    with self._lock:
+      if self.active:
+        raise RuntimeError("A profiling session is already running")
+      self.session = session
+      self._inflight = 0
+      self._stop.clear()
+      self.active = True
+      self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+      self._thread.start()
+    return session
+
+  def stop(self) -> Optional[ProfileSession]:
+    """
+    End the running session early, if any.
+    """
+    with self._lock:
+      self._finish()
+    return self.session
+
+  def _finish(self) -> None:
+    if not self.active:
+      return
+    self.active = False
+    self._stop.set()
+    if self.session is not None:
+      self.session.finished = time.monotonic()
+
+  @contextmanager
+  def track(self, kind: str) -> Iterator[None]:
+    """
+    Mark a request ('requests') or chat turn ('turns') as in flight.
+    """
+    session = self.session
+    if not self.active or session is None or (session.mode != kind and session.mode != "duration"):
+      yield
+      return
+
+    with self._lock:
+      self._inflight += 1
+    try:
+      yield
+    finally:
+      with self._lock:
+        self._inflight -= 1
+        if session.mode == kind:
+          session.completed += 1
+          if session.completed >= session.count:
+            self._finish()
+
+  def _sample(self, session: ProfileSession) -> None:
+    own_id = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    for thread_id, frame in sys._current_frames().items():
+      if thread_id == own_id:
+        continue
+      stack: list[Frame] = []
+      in_app = False
+      while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        in_app = in_app or _is_app_file(code.co_filename)
+        frame = frame.f_back
+      # Idle pool workers and the idle event loop have no backend frames
+      if not in_app:
+        continue
+      stack.reverse()
+      session.stacks[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+    session.samples += 1
+
+  def _run(self) -> None:
+    session = self.session
+    while not self._stop.wait(session.interval):
+      if time.monotonic() >= session.deadline:
+        with self._lock:
+          self._finish()
+        break
+      if session.mode == "duration" or self._inflight > 0:
+        self._sample(session)
+
+
+# Shared profiler for the whole backend
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+  """
+  ASGI middleware tracking HTTP requests for 'requests' profiling sessions.
+  """
+  def __init__(self, app: Any, exclude_prefix: str = "/profiling") -> None:
+    self.app = app
+    self.exclude_prefix = exclude_prefix
+
+  async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+    if not profiler.active or scope["type"] != "http" or scope["path"].startswith(self.exclude_prefix):
+      await self.app(scope, receive, send)
+      return
+    with profiler.track("requests"):
+      await self.app(scope, receive, send)
@@ -0,0 +1,35 @@
+# internal/rate.py
+
+import time
+
+
+class TokenBucket:
+  """
+  Classic token bucket; refills `rate` tokens per second up to `burst`.
+  """
+  def __init__(self, rate: float, burst: int) -> None:
+    self.rate = rate
+    self.burst = burst
+    self.tokens: float = burst
+    self.updated: float = time.monotonic()
+
+  def _refill(self) -> None:
+    now = time.monotonic()
+    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+  def try_acquire(self) -> bool:
+    self._refill()
+    if self.tokens >= 1:
+      self.tokens -= 1
+      return True
+    return False
+
+  def retry_after(self) -> float:
+    """
+    Seconds until the next token is available.
+    """
+    self._refill()
+    if self.tokens >= 1 or self.rate <= 0:
+      return 0.0
+    return (1 - self.tokens) / self.rate
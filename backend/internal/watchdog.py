@@ -0,0 +1,162 @@
+# internal/watchdog.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+
+from internal.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Settings – override via env vars
+LOOP_WATCHDOG: bool = os.getenv("LOOP_WATCHDOG", "on") != "off"
+LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50")) / 1000
+LOOP_STALL_THRESHOLD: float = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "200")) / 1000
+
+# Metrics
+lag_histogram = registry.histogram(
+  "event_loop_lag_seconds",
+  "Delay between when the event loop should have woken up and when it did",
+  buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+stall_counter = registry.counter("event_loop_stalls_total", "Times the event loop was blocked past the stall threshold")
+
+
+class LoopBlockedError(AssertionError):
+  """
+  Raised by loop_block_budget() when the loop was blocked past the budget.
+  """
+
+
+class LoopWatchdog:
+  """
+  Measures event-loop lag with a heartbeat task. A monitor thread watches
+  the heartbeat and, when it stops for longer than `stall_threshold`,
+  captures the stack of the loop thread, i.e. the code blocking it.
+  """
+  def __init__(
+    self,
+    interval: float = LOOP_LAG_INTERVAL,
+    stall_threshold: float = LOOP_STALL_THRESHOLD,
+    max_stalls: int = 50,
+  ) -> None:
+    self.interval = interval
+    self.stall_threshold = stall_threshold
+    self.stalls: deque[dict[str, Any]] = deque(maxlen=max_stalls)
+    self.max_lag = 0.0
+
+    self._last_beat = time.monotonic()
+    self._open_stall: Optional[dict[str, Any]] = None
+    self._loop_thread_id: Optional[int] = None
+    self._task: Optional[asyncio.Task] = None
+    self._monitor: Optional[threading.Thread] = None
+    self._stop = threading.Event()
+
+  def start(self) -> None:
+    """
+    Start watching the running event loop.
+    """
+    if self._task is not None:
+      return
+    self._loop_thread_id = threading.get_ident()
+    self._last_beat = time.monotonic()
+    self._stop.clear()
+    self._task = asyncio.create_task(self._beat(), name="loop-watchdog")
+    self._monitor = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+    self._monitor.start()
+
+  async def stop(self) -> None:
+    """
+    Stop the heartbeat and the monitor thread.
+    """
+    if self._task is None:
+      return
+    self._stop.set()
+    self._task.cancel()
+    try:
+      await self._task
+    except asyncio.CancelledError:
+      pass
+    self._task = None
+
+  async def _beat(self) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      expected = loop.time() + self.interval
+      await asyncio.sleep(self.interval)
+      lag = max(loop.time() - expected, 0.0)
+      lag_histogram.observe(lag)
+      self.max_lag = max(self.max_lag, lag)
+
+      # The loop is running again, close the stall the monitor opened
+      stall = self._open_stall
+      if stall is not None:
+        stall["duration"] = round(lag, 4)
+        self._open_stall = None
+        logger.warning("Event loop was blocked for %.0f ms", lag * 1000)
+      self._last_beat = time.monotonic()
+
+  def _watch(self) -> None:
+    while not self._stop.wait(self.interval):
+      blocked_for = time.monotonic() - self._last_beat - self.interval
+      if blocked_for < self.stall_threshold or self._open_stall is not None:
+        continue
+
+      frame = sys._current_frames().get(self._loop_thread_id)
+      stack = traceback.format_stack(frame) if frame is not None else []
+      stall = {
+        "detected_at": datetime.now(timezone.utc).isoformat(),
+        "blocked_for": round(blocked_for, 4),
+        "duration": None,
+        "stack": [line.rstrip() for line in stack],
+      }
+      self._open_stall = stall
+      self.stalls.append(stall)
+      stall_counter.inc()
+      logger.warning(
+        "Event loop blocked for over %.0f ms in:\n%s", blocked_for * 1000, "".join(stack[-8:])
+      )
+
+  def report(self) -> dict[str, Any]:
+    """
+    Recent stalls and the worst lag seen so far.
+    """
+    return {
+      "stall_threshold_ms": self.stall_threshold * 1000,
+      "max_lag_ms": round(self.max_lag * 1000, 1),
+      "stalls": list(self.stalls),
+    }
+
+
+# Shared watchdog for the app's event loop
+watchdog = LoopWatchdog()
+
+
+@asynccontextmanager
+async def loop_block_budget(budget_ms: float) -> AsyncIterator[LoopWatchdog]:
+  """
+  Fail with LoopBlockedError if anything inside the block stalls the
+  event loop for longer than `budget_ms`. Meant for CI benchmarks.
+  """
+  budget = budget_ms / 1000
+  checker = LoopWatchdog(interval=min(0.01, budget / 4), stall_threshold=budget)
+  checker.start()
+  try:
+    yield checker
+  finally:
+    await checker.stop()
+
+  if checker.stalls or checker.max_lag > budget:
+    worst = max(checker.stalls, key=lambda s: s["duration"] or s["blocked_for"], default=None)
+    where = "\n".join(worst["stack"][-8:]) if worst else "(no stack captured)"
+    raise LoopBlockedError(
+      f"Event loop blocked for {checker.max_lag * 1000:.0f} ms, budget is {budget_ms:.0f} ms. Worst stall in:\n{where}"
+    )
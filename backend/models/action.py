@@ -1,49 +1,60 @@
 import logging
+from functools import lru_cache
 from typing import Any, Optional
+from uuid import uuid4
 
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, FunctionMessage, ToolMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools.structured import StructuredTool
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt.tool_node import ToolNode
 
 import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+from models.conversation import Conversation, conversation_tool_node
+from models.tool_cache import cached_tool, invalidates_user
+from models.usage import new_usage, record_usage
+
 logger = logging.getLogger(__name__)
 
-# System prompt for the Action Agent
-def _create_system_message(additional_rules: str = '') -> SystemMessage:
+# System prompt for the Action Agent, kept byte-identical across turns so the provider can cache the prefix
+SYSTEM_MESSAGE = SystemMessage(
+  content=(
+    "You are the Action Agent for Level-1 customer support for the website ran by Pace, which is the innovation hub of TCS (action_agent). "
+    "This includes operations regarding accounts, and if there is a possibility that's the goal, ask clarifying questions."
+    
+    "Use the available tools to help the user with customer support. "
+    "Notify the user about which tools you've used and why. "
+    "You should always prioritize helping in any way you can before switching with another agent. "
+
+    "When a prompt is confusing, ask clarifying questions rather than immidiatly using tools. "
+    "Investigate the messages history. "
+    
+    "If the user requests information about the organization or content, call the '_switch_to_information_agent' tool, and explicitly notify the user by including a message in the response. "
+    "Make it sound natural and as if you're getting the help of another agent and the reason why. "
+    "ALWAYS ask permission from the '_switch_to_information_agent' tool, before you notify the user. "
+    
+    "The output is in the form of a chat message and you shouldn't use any line breaks. Act as if it's whatsapp and you're giving a quick response. "
+    "Never attempt to answer on behalf of the other agents, even if you're not allowed to switch right now. "
+    
+    "If you're not allowed to switch to another agent for help, just perform your part of the user's question and await a response from the human. "
+    "Never say you 'found information', you are the assistent that knows everything you found in tools inherently. "
+  )
+)
+
+def _create_rules_message(agents_invoked: str) -> Optional[SystemMessage]:
+  """
+  Per-turn rules, sent after the history so they never change the cached prefix.
+  """
+  if agents_invoked == '':
+    return None
   return SystemMessage(
-    content=(
-      "You are the Action Agent for Level-1 customer support for the website ran by Pace, which is the innovation hub of TCS (action_agent). "
-      "This includes operations regarding accounts, and if there is a possibility that's the goal, ask clarifying questions."
-      
-      "Use the available tools to help the user with customer support. "
-      "Notify the user about which tools you've used and why. "
-      "You should always prioritize helping in any way you can before switching with another agent. "
-
-      "When a prompt is confusing, ask clarifying questions rather than immidiatly using tools. "
-      "Investigate the messages history. "
-      
-      "If the user requests information about the organization or content, call the '_switch_to_information_agent' tool, and explicitly notify the user by including a message in the response. "
-      "Make it sound natural and as if you're getting the help of another agent and the reason why. "
-      "ALWAYS ask permission from the '_switch_to_information_agent' tool, before you notify the user. "
-      
-      "The output is in the form of a chat message and you shouldn't use any line breaks. Act as if it's whatsapp and you're giving a quick response. "
-      "Never attempt to answer on behalf of the other agents, even if you're not allowed to switch right now. "
-      
-      "If you're not allowed to switch to another agent for help, just perform your part of the user's question and await a response from the human. "
-      "Never say you 'found information', you are the assistent that knows everything you found in tools inherently. "
-      f"{additional_rules}"
-    )
+    content=f"You are currently NOT allowed to switch to {agents_invoked} at the moment. They already tried to help the user. Ask for clarifying questions instead."
   )
 
-# Placeholder tool implementations
+# Placeholder tool implementations, read-only ones are cached per conversation and user
+@invalidates_user()
 def _reset_user_password(username: str) -> dict[str, Any]:
   logger.info("Tool call: reset_user_password(username=%s)", username)
   return {"status": "success", "username": username}
@@ -52,12 +63,14 @@ def _create_support_ticket(username: str, issue: str) -> dict[str, Any]:
   logger.info("Tool call: create_support_ticket(username=%s, issue=%s)", username, issue)
   return {"ticket_id": "TBD", "status": "created"}
 
-def _check_order_status(username: str, order_id: str) -> dict[str, Any]:
+@cached_tool(ttl=30)
+def _check_order_status(username: str, order_id: str, config: RunnableConfig) -> dict[str, Any]:
   logger.info("Tool call: check_order_status(username=%s, order_id=%s)", username, order_id)
   return {"order_id": order_id, "status": "pending"}
 
+@invalidates_user()
 def _update_user_profile(username: str, profile_updates: dict[str, Any]) -> dict[str, Any]:
-  logger.info("Tool call: update_user_profile(username=%s, updates=%s)", username, profile_updates)
+  logger.info("Tool call: update_user_profile(username=%s, fields=%s)", username, list(profile_updates))
   return {"status": "success", "updated_fields": list(profile_updates.keys())}
 
 def _send_followup_email(username: str, email_body: str) -> dict[str, Any]:
@@ -94,34 +107,41 @@ _tools = [
   send_email_tool,
   switch_info_tool,
 ]
-action_model_tools = ToolNode(_tools)
+action_model_tools = conversation_tool_node(_tools)
 
 # LLM node
 COMPLETION_MODEL = "gpt-4o-mini"
 
+@lru_cache()
+def _get_llm(model: str) -> Any:
+  """
+  Bind the tools once per model so the tool schemas are identical on every call.
+  """
+  return ChatOpenAI(model=model, temperature=0).bind_tools(_tools)
+
 def action_model(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
   # Fetch the state information
-  messages = state.get("messages", [])
-  agents_invoked = config['metadata']['agents_invoked']
-  additional_rules = f"You are currently NOT allowed to switch to {agents_invoked} at the moment. They already tried to help the user. Ask for clarifying questions instead."
-  system_msg = _create_system_message(additional_rules) if agents_invoked != '' else _create_system_message()
-
-  # Prepare the message history
-  prepared: list[Any] = []
-  for msg in messages:
-    if isinstance(msg, ToolMessage):
-      prepared.append(FunctionMessage(name=msg.name, content=msg.content))
-    else:
-      prepared.append(msg)
+  conversation: Conversation = state["conversation"]
+  rules_msg = _create_rules_message(config['metadata']['agents_invoked'])
+
+  # Stable prefix first, already prepared history, per-turn rules last
+  prompt = [SYSTEM_MESSAGE, *conversation.prepared]
+  if rules_msg is not None:
+    prompt.append(rules_msg)
 
   # Invoke the llm
-  llm = ChatOpenAI(model=COMPLETION_MODEL, temperature=0).bind_tools(_tools)
-  response = llm.invoke([system_msg] + prepared)
-  return {"messages": [response], "response": response.content}
+  started = time.monotonic()
+  response = _get_llm(COMPLETION_MODEL).invoke(prompt)
+  record_usage(
+    config['configurable']['usage'], "action_agent", COMPLETION_MODEL, response,
+    latency=time.monotonic() - started,
+  )
+  conversation.append(response)
+  return {"conversation": conversation, "response": response.content}
 
 # flow control
 def action_model_should_continue(state: dict[str, Any]) -> str:
-  last = state.get("messages", [])[-1]
+  last = state["conversation"].last
   if getattr(last, "tool_calls", None):
     return "action_model_tools"
   return END
@@ -137,40 +157,38 @@ class ActionAssistant:
     self.workflow.add_conditional_edges("action_model", action_model_should_continue)
     self.workflow.add_edge("action_model_tools", "action_model")
 
-    checkpointer = MemorySaver()
-    self.app = self.workflow.compile(checkpointer=checkpointer)
+    # No checkpointer: the caller owns the conversation, and checkpointing
+    # would re-serialize the whole history after every node
+    self.app = self.workflow.compile()
 
   def invoke(
     self, 
-    messages: list[BaseMessage], 
+    conversation: Conversation, 
     agents_invoked: list[str],
     user_prompt: Optional[str] = None
-  ) -> tuple[list[BaseMessage], str, str]:
+  ) -> dict[str, Any]:
     global next_agent
 
-    # Set up the next agent state
-    next_agent_id = round(time.time())
-    while next_agent.get(next_agent_id, None) != None:
-      next_agent_id += 1
-    next_agent_id = str(next_agent_id)
+    # Set up the next agent state, keyed per invocation since turns of
+    # different sessions run on several threads at once
+    next_agent_id = uuid4().hex
     next_agent[next_agent_id] = "action_agent"
 
-    # Prepare the conversation up to now
-    convo = list(messages)
+    # Add the prompt to the conversation
     if user_prompt:
-      convo.append(HumanMessage(content=user_prompt))
+      conversation.append(HumanMessage(content=user_prompt))
 
     # Invoke the graph
-    init_state = {"messages": convo, "response": ""}
+    usage = new_usage()
+    init_state = {"conversation": conversation, "response": ""}
     final_state = self.app.invoke(
       init_state,
       config=RunnableConfig(
         configurable={
-          "thread_id": "main", 
-          "checkpoint_ns": "action", 
-          "checkpoint_id": "0", 
           "next_agent_id": next_agent_id,
-          "agents_invoked": f"[{', '.join(agents_invoked)}]" if len(agents_invoked) > 0 else ''
+          "agents_invoked": f"[{', '.join(agents_invoked)}]" if len(agents_invoked) > 0 else '',
+          "usage": usage,
+          "conversation_id": conversation.id
         },
         metadata={}
       )
@@ -178,7 +196,7 @@ class ActionAssistant:
 
     # Return the results
     return {
-      "messages": final_state["messages"],
       "response": final_state["response"],
-      "next_agent": next_agent.pop(next_agent_id)
+      "next_agent": next_agent.pop(next_agent_id),
+      "usage": usage
     }
@@ -0,0 +1,94 @@
+# models/conversation.py
+
+import uuid
+from typing import Any, Callable, Iterable, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, FunctionMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt.tool_node import ToolNode
+
+def _prepare(msg: BaseMessage) -> Optional[BaseMessage]:
+  """
+  Convert a message to the form sent to the LLM, or None if it is not sent.
+  Tool results become function messages and the tool-call requests that
+  produced them are dropped, or reduced to their text when they have any.
+  """
+  if isinstance(msg, ToolMessage):
+    return FunctionMessage(name=msg.name, content=msg.content)
+  if isinstance(msg, AIMessage) and msg.tool_calls:
+    return AIMessage(content=msg.content) if msg.content else None
+  return msg
+
+
+def _is_dialogue(msg: BaseMessage) -> bool:
+  """
+  Whether the message is a user prompt or an assistant answer, as opposed
+  to a tool call or tool result.
+  """
+  return isinstance(msg, HumanMessage) or (isinstance(msg, AIMessage) and not msg.tool_calls)
+
+
+class Conversation:
+  """
+  Chat history shared by the agents of one chat session.
+  Every message is converted once when it is appended, so the LLM nodes
+  can send `prepared` as-is instead of rebuilding the history per call.
+  """
+  def __init__(self, messages: Optional[Iterable[BaseMessage]] = None, id: Optional[str] = None) -> None:
+    self.id = id or uuid.uuid4().hex
+    self.messages: list[BaseMessage] = []
+    self.prepared: list[BaseMessage] = []
+    self._prepared_flags: list[bool] = []
+    # User and assistant messages only, the measure tiering thresholds are tuned on
+    self.dialogue_length = 0
+    if messages:
+      self.extend(messages)
+
+  def __len__(self) -> int:
+    return len(self.messages)
+
+  def append(self, msg: BaseMessage) -> None:
+    prepared = _prepare(msg)
+    self.messages.append(msg)
+    self.dialogue_length += _is_dialogue(msg)
+    self._prepared_flags.append(prepared is not None)
+    if prepared is not None:
+      self.prepared.append(prepared)
+
+  def extend(self, messages: Iterable[BaseMessage]) -> None:
+    for msg in messages:
+      self.append(msg)
+
+  def pop(self) -> BaseMessage:
+    if self._prepared_flags.pop():
+      self.prepared.pop()
+    msg = self.messages.pop()
+    self.dialogue_length -= _is_dialogue(msg)
+    return msg
+
+  def truncate(self, length: int) -> None:
+    """
+    Drop every message after the first `length` ones.
+    """
+    while len(self.messages) > length:
+      self.pop()
+
+  @property
+  def last(self) -> Optional[BaseMessage]:
+    return self.messages[-1] if self.messages else None
+
+
+def conversation_tool_node(tools: list[Any]) -> Callable[[dict[str, Any], RunnableConfig], dict[str, Any]]:
+  """
+  Wrap a ToolNode so it runs the tool calls of the conversation's last
+  message and appends the results to the conversation.
+  """
+  tool_node = ToolNode(tools)
+
+  def run_tools(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
+    conversation: Conversation = state["conversation"]
+    result = tool_node.invoke({"messages": [conversation.last]}, config)
+    conversation.extend(result["messages"])
+    return {"conversation": conversation, "response": state.get("response", "")}
+
+  return run_tools
@@ -1,7 +1,10 @@
 # models/embedding.py
 
+import base64
 from typing import List
 
+import numpy as np
+
 from models.client import get_openai_client
 
 def embed_text(text: str, model: str = "text-embedding-ada-002") -> List[float]:
@@ -27,3 +30,16 @@ def embed_texts(texts: List[str], model: str = "text-embedding-ada-002") -> List
     encoding_format="float"
   )
   return [d.embedding for d in resp.data]
+
+def embed_texts_array(texts: List[str], model: str = "text-embedding-ada-002") -> np.ndarray:
+  """
+  Generate embeddings as a float32 matrix, one row per input string.
+  Requests base64 output so no Python float lists are built.
+  """
+  client = get_openai_client()
+  resp = client.embeddings.create(
+    model=model,
+    input=texts,
+    encoding_format="base64"
+  )
+  return np.stack([np.frombuffer(base64.b64decode(d.embedding), dtype="<f4") for d in resp.data])
@@ -1,60 +1,88 @@
 # models/information.py
 
 import logging
+import os
 import time
+from functools import lru_cache
 from typing import Any, Optional
+from uuid import uuid4
 
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, FunctionMessage, ToolMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools.structured import StructuredTool
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt.tool_node import ToolNode
 
 from data.search.faq import search_faqs
+from models.conversation import Conversation, conversation_tool_node
+from models.prefetch import FAQ_PREFETCH, FaqPrefetch
+from models.tiering import TIER_MODELS, TierSelector
+from models.tool_cache import cached_tool
+from models.usage import new_usage, record_usage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-# direct system prompt
-def _create_system_message(additional_rules: str = '') -> SystemMessage:
+# direct system prompt, kept byte-identical across turns so the provider can cache the prefix
+SYSTEM_MESSAGE = SystemMessage(
+  content=(
+    "You are an assistent that provides information for the website ran by Pace, which is the innovation hub of TCS (information_agent). "
+    "You are also the agent answering general pleasantries from the user, like greetings. "
+    "Give your own spin on the way the information is written and keep it short and no emoticons. "
+    "You should always prioritize helping in any way you can before switching with another agent. "
+
+    "When a prompt is confusing, ask clarifying questions rather than immidiatly using tools. "
+    "Investigate the messages history. "
+
+    "If the user requests help with their account or L1 customer service, use the '_switch_to_action_agent' tool, and explicitly notify the user by including a message in the response. "
+    "Make it sound natural and as if you're getting the help of another agent and the reason why. "
+    "ALWAYS ask permission from the '_switch_to_action_agent' tool, before you notify the user. "
+    
+    "When you call 'faq_search' for the purpose of providing information, always mention your findings even when you intend to switch to another agent. "
+    
+    "The output is in the form of a chat message and you shouldn't use any line breaks. Act as if it's whatsapp and you're giving a quick response."
+    "Never attempt to answer on behalf of the other agents, even if you're not allowed to switch right now. "
+    "If you're not allowed to switch to another agent for help, just perform your part of the user's question and await a response from the human. "
+    "Never say you 'found information', you are the assistent that knows everything you found in tools inherently. "
+  )
+)
+
+def _create_rules_message(agents_invoked: str) -> Optional[SystemMessage]:
+  """
+  Per-turn rules, sent after the history so they never change the cached prefix.
+  """
+  if agents_invoked == '':
+    return None
   return SystemMessage(
-    content=(
-      "You are an assistent that provides information for the website ran by Pace, which is the innovation hub of TCS (information_agent). "
-      "You are also the agent answering general pleasantries from the user, like greetings. "
-      "Give your own spin on the way the information is written and keep it short and no emoticons. "
-      "You should always prioritize helping in any way you can before switching with another agent. "
-
-      "When a prompt is confusing, ask clarifying questions rather than immidiatly using tools. "
-      "Investigate the messages history. "
-
-      "If the user requests help with their account or L1 customer service, use the '_switch_to_action_agent' tool, and explicitly notify the user by including a message in the response. "
-      "Make it sound natural and as if you're getting the help of another agent and the reason why. "
-      "ALWAYS ask permission from the '_switch_to_action_agent' tool, before you notify the user. "
-      
-      "When you call 'faq_search' for the purpose of providing information, always mention your findings even when you intend to switch to another agent. "
-      
-      "The output is in the form of a chat message and you shouldn't use any line breaks. Act as if it's whatsapp and you're giving a quick response."
-      "Never attempt to answer on behalf of the other agents, even if you're not allowed to switch right now. "
-      "If you're not allowed to switch to another agent for help, just perform your part of the user's question and await a response from the human. "
-      "Never say you 'found information', you are the assistent that knows everything you found in tools inherently. "
-      f"{additional_rules}"
-    )
+    content=f"You are currently NOT allowed to switch to {agents_invoked} at the moment. They already tried to help the user. Ask for clarifying questions instead."
   )
 
-# OpenAI model
-COMPLETION_MODEL = "gpt-4o"
+# OpenAI model used when tiering escalates, the default tier is in models/tiering.py
+COMPLETION_MODEL = TIER_MODELS["large"]
+
+# Hits scoring below this are not shown to the model – override via env var
+FAQ_MIN_SCORE: float = float(os.getenv("FAQ_MIN_SCORE", "0.85"))
+
+# FAQ lookups repeat across follow-ups, so they are cached per conversation
+@cached_tool(ttl=float(os.getenv("FAQ_TOOL_CACHE_TTL", "300")), user_arg=None)
+def _lookup_faqs(query: str, k: int, config: RunnableConfig) -> list[dict[str, Any]]:
+  # Reuse the speculative search of the prompt when the query is close enough
+  prefetch: Optional[FaqPrefetch] = config['configurable'].get('faq_prefetch')
+  items = prefetch.serve(query, k) if prefetch else None
+  if items is None:
+    items = search_faqs(query=query, k=k, min_score=FAQ_MIN_SCORE)
+  return [item.model_dump(exclude_none=True) for item in items]
 
 # FAQ search tool
-def _faq_search_tool(query: str, k: int = 3) -> list[dict[str, Any]]:
+def _faq_search_tool(query: str, config: RunnableConfig, k: int = 3) -> list[dict[str, Any]]:
   """Search the FAQ database for relevant entries based on a query and return up to k results."""
   logger.info("Tool call: faq_search(query=%s, k=%d)", query, k)
+  results = _lookup_faqs(query, k, config)
 
-  items = search_faqs(query=query, k=k)
-  results = [item.model_dump() for item in items]
+  # Weak or missing hits push the rest of the turn to the larger model
+  tiering: Optional[TierSelector] = config['configurable'].get('tiering')
+  if tiering:
+    tiering.record_retrieval(results)
   return results
 
 # Switch to action agent tool
@@ -81,32 +109,50 @@ switch_tool = StructuredTool.from_function(
 
 # tool node and binding
 _tools = [faq_tool, switch_tool]
-information_model_tools = ToolNode(_tools)
+information_model_tools = conversation_tool_node(_tools)
 
 # LLM node
+@lru_cache()
+def _get_llm(model: str) -> Any:
+  """
+  Bind the tools once per model so the tool schemas are identical on every call.
+  """
+  return ChatOpenAI(model=model, temperature=0).bind_tools(_tools)
+
 def information_model(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
   # Fetch the state information
-  messages = state.get("messages", [])
-  agents_invoked = config['metadata']['agents_invoked']
-  additional_rules = f"You are currently NOT allowed to switch to {agents_invoked} at the moment. They already tried to help the user. Ask for clarifying questions instead."
-  system_msg = _create_system_message(additional_rules) if agents_invoked != '' else _create_system_message()
-
-  # Prepare the message history
-  prepared: list[Any] = []
-  for msg in messages:
-    if isinstance(msg, ToolMessage):
-      prepared.append(FunctionMessage(name=msg.name, content=msg.content))
-    else:
-      prepared.append(msg)
+  conversation: Conversation = state["conversation"]
+  rules_msg = _create_rules_message(config['metadata']['agents_invoked'])
+  prefetch: Optional[FaqPrefetch] = config['configurable'].get('faq_prefetch')
+  context_msg = prefetch.context_message() if prefetch and FAQ_PREFETCH == "inject" else None
+
+  # Use prefetched hits as an early confidence signal when they are already there
+  tiering: TierSelector = config['configurable']['tiering']
+  early_hits = prefetch.result(timeout=0) if prefetch and tiering.retrieval_score is None else None
+  if early_hits:
+    tiering.record_retrieval([hit.model_dump() for hit in early_hits])
+  tier, model = tiering.select(conversation.dialogue_length)
+
+  # Stable prefix first, already prepared history, per-turn messages last
+  prompt = [SYSTEM_MESSAGE, *conversation.prepared]
+  if context_msg is not None:
+    prompt.append(context_msg)
+  if rules_msg is not None:
+    prompt.append(rules_msg)
 
   # Invoke the llm
-  llm = ChatOpenAI(model=COMPLETION_MODEL, temperature=0).bind_tools(_tools)
-  response = llm.invoke([system_msg] + prepared)
-  return {"messages": [response], "response": response.content}
+  started = time.monotonic()
+  response = _get_llm(model).invoke(prompt)
+  record_usage(
+    config['configurable']['usage'], "information_agent", model, response,
+    tier=tier, latency=time.monotonic() - started,
+  )
+  conversation.append(response)
+  return {"conversation": conversation, "response": response.content}
 
 # flow control
 def information_model_should_continue(state: dict[str, Any]) -> str:
-  last = state.get("messages", [])[-1]
+  last = state["conversation"].last
   if getattr(last, "tool_calls", None):
     return "information_model_tools"
   return END
@@ -122,48 +168,60 @@ class InformationAssistant:
     self.workflow.add_conditional_edges("information_model", information_model_should_continue)
     self.workflow.add_edge("information_model_tools", "information_model")
 
-    checkpointer = MemorySaver()
-    self.app = self.workflow.compile(checkpointer=checkpointer)
+    # No checkpointer: the caller owns the conversation, and checkpointing
+    # would re-serialize the whole history after every node
+    self.app = self.workflow.compile()
+
+    # Tier that answered the previous prompt, to spot follow-ups
+    self.last_tier: Optional[str] = None
 
   def invoke(
     self, 
-    messages: list[BaseMessage], 
+    conversation: Conversation, 
     agents_invoked: list[str],
     user_prompt: Optional[str] = None
   ) -> dict[str, Any]:
     global next_agent
 
-    # Set up the next agent state
-    next_agent_id = round(time.time())
-    while next_agent.get(next_agent_id, None) != None:
-      next_agent_id += 1
-    next_agent_id = str(next_agent_id)
+    # Set up the next agent state, keyed per invocation since turns of
+    # different sessions run on several threads at once
+    next_agent_id = uuid4().hex
     next_agent[next_agent_id] = "information_agent"
 
-    # Prepare the conversation up to now
-    convo = list(messages)
+    # Add the prompt to the conversation
     if user_prompt:
-      convo.append(HumanMessage(content=user_prompt))
+      conversation.append(HumanMessage(content=user_prompt))
+
+    # Start searching the raw prompt while the first LLM call runs
+    prefetch = FaqPrefetch(user_prompt, min_score=FAQ_MIN_SCORE) if user_prompt and FAQ_PREFETCH != "off" else None
 
     # Invoke the graph
-    init_state = {"messages": convo, "response": ""}
+    usage = new_usage()
+    tiering = TierSelector(user_prompt or "", previous_tier=self.last_tier)
+    init_state = {"conversation": conversation, "response": ""}
     final_state = self.app.invoke(
       init_state,
       config=RunnableConfig(
         configurable={
-          "thread_id": "main", 
-          "checkpoint_ns": "info", 
-          "checkpoint_id": "0", 
           "next_agent_id": next_agent_id,
-          "agents_invoked": f"[{', '.join(agents_invoked)}]" if len(agents_invoked) > 0 else ''
+          "agents_invoked": f"[{', '.join(agents_invoked)}]" if len(agents_invoked) > 0 else '',
+          "usage": usage,
+          "faq_prefetch": prefetch,
+          "tiering": tiering,
+          "conversation_id": conversation.id
         },
         metadata={}
       )
     )
 
+    if prefetch:
+      prefetch.finish()
+    self.last_tier = tiering.tier
+    logger.info("Information agent tier: %s (%s)", tiering.tier, tiering.reason)
+
     # Return the results
     return {
-      "messages": final_state["messages"],
       "response": final_state["response"],
-      "next_agent": next_agent.pop(next_agent_id)
+      "next_agent": next_agent.pop(next_agent_id),
+      "usage": usage
     }
@@ -0,0 +1,126 @@
+# models/prefetch.py
+
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from langchain_core.messages import SystemMessage
+
+from data.search.faq import ScoredFaqItem, search_faqs
+from internal.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Prefetch mode – override via env var:
+#   "off"    – no speculative search
+#   "tool"   – search the raw prompt while the LLM runs, serve faq_search from it
+#   "inject" – like "tool", and also hand the hits to the LLM so it can skip the tool
+FAQ_PREFETCH: str = os.getenv("FAQ_PREFETCH", "off")
+FAQ_PREFETCH_K: int = int(os.getenv("FAQ_PREFETCH_K", "3"))
+# Minimum token overlap between the tool query and the prompt to reuse the results
+FAQ_PREFETCH_SIMILARITY: float = float(os.getenv("FAQ_PREFETCH_SIMILARITY", "0.5"))
+# How long the first LLM call may wait for hits to inject, in seconds
+FAQ_PREFETCH_WAIT: float = float(os.getenv("FAQ_PREFETCH_WAIT", "0.5"))
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("FAQ_PREFETCH_WORKERS", "4")), thread_name_prefix="faq-prefetch")
+
+# Metrics
+prefetch_counter = registry.counter("faq_prefetch_total", "Speculative FAQ searches by outcome")
+prefetch_saved_histogram = registry.histogram("faq_prefetch_saved_seconds", "Latency saved by serving faq_search from a prefetch")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def _tokens(text: str) -> set[str]:
+  return set(_TOKEN_RE.findall(text.lower()))
+
+def query_similarity(a: str, b: str) -> float:
+  """
+  Jaccard overlap of the lowercase word tokens of two queries.
+  """
+  ta, tb = _tokens(a), _tokens(b)
+  if not ta or not tb:
+    return 0.0
+  return len(ta & tb) / len(ta | tb)
+
+
+class FaqPrefetch:
+  """
+  Speculative FAQ search for the raw user prompt, started in the background
+  so it overlaps with the information agent's first LLM call.
+  """
+  def __init__(self, prompt: str, k: int = FAQ_PREFETCH_K, min_score: Optional[float] = None) -> None:
+    self.prompt = prompt
+    self.k = k
+    self.min_score = min_score
+    self.duration: Optional[float] = None
+    self.outcome = "unused"
+    self._context: Optional[SystemMessage] = None
+    self._context_ready = False
+    self._future = _executor.submit(self._run)
+
+  def _run(self) -> list[ScoredFaqItem]:
+    started = time.monotonic()
+    results = search_faqs(self.prompt, k=self.k, min_score=self.min_score)
+    self.duration = time.monotonic() - started
+    return results
+
+  def result(self, timeout: Optional[float] = None) -> Optional[list[ScoredFaqItem]]:
+    """
+    Prefetched hits, or None if they failed or are not ready within `timeout`.
+    """
+    try:
+      return self._future.result(timeout=timeout)
+    except FutureTimeoutError:
+      return None
+    except Exception as e:
+      logger.warning("FAQ prefetch failed: %s", e)
+      self.outcome = "error"
+      return None
+
+  def serve(self, query: str, k: int) -> Optional[list[ScoredFaqItem]]:
+    """
+    Answer a faq_search call from the prefetch when the query is close enough.
+    """
+    if k > self.k or query_similarity(query, self.prompt) < FAQ_PREFETCH_SIMILARITY:
+      self.outcome = "miss"
+      return None
+
+    waited_from = time.monotonic()
+    results = self.result()
+    if results is None:
+      return None
+
+    # The tool would have spent the full search time, we only spent the wait
+    saved = max((self.duration or 0.0) - (time.monotonic() - waited_from), 0.0)
+    prefetch_saved_histogram.observe(saved)
+    self.outcome = "hit"
+    return results[:k]
+
+  def context_message(self) -> Optional[SystemMessage]:
+    """
+    Hits formatted for the LLM, waiting at most FAQ_PREFETCH_WAIT once.
+    """
+    if not self._context_ready:
+      self._context_ready = True
+      results = self.result(timeout=FAQ_PREFETCH_WAIT)
+      if results:
+        entries = json.dumps([r.model_dump(exclude_none=True) for r in results])
+        self._context = SystemMessage(
+          content=f"FAQ entries relevant to the latest user message, use them instead of calling 'faq_search' when they answer it: {entries}"
+        )
+        self.outcome = "injected"
+    return self._context
+
+  def finish(self) -> None:
+    """
+    Record how the prefetch was used once the agent is done.
+    """
+    prefetch_counter.inc(outcome=self.outcome)
+    logger.info(
+      "FAQ prefetch: outcome=%s search_ms=%s",
+      self.outcome, f"{self.duration * 1000:.0f}" if self.duration is not None else "-",
+    )
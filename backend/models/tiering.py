@@ -0,0 +1,95 @@
+# models/tiering.py
+
+import os
+import re
+from typing import Any, Optional
+
+# Models per tier – override via env vars
+TIER_MODELS: dict[str, str] = {
+  "small": os.getenv("INFO_MODEL_SMALL", "gpt-4o-mini"),
+  "large": os.getenv("INFO_MODEL_LARGE", "gpt-4o"),
+}
+
+# "adaptive" picks a tier per LLM call, "small" or "large" pins one
+INFO_MODEL_TIERING: str = os.getenv("INFO_MODEL_TIERING", "adaptive")
+
+# Default thresholds, tune them with scripts/evaluate_tiering.py
+DEFAULT_THRESHOLDS: dict[str, float] = {
+  "max_prompt_words": float(os.getenv("TIER_MAX_PROMPT_WORDS", "40")),
+  "max_questions": float(os.getenv("TIER_MAX_QUESTIONS", "1")),
+  "max_conversation_messages": float(os.getenv("TIER_MAX_CONVERSATION_MESSAGES", "24")),
+  "min_retrieval_score": float(os.getenv("TIER_MIN_RETRIEVAL_SCORE", "0.9")),
+}
+
+# Phrases that suggest the user is unhappy with the previous answer
+_FOLLOW_UP_RE = re.compile(
+  r"\b(that'?s not|not what i|what do you mean|doesn'?t answer|you didn'?t|wrong|i meant|explain (more|further)|more detail)\b",
+  re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"\w+")
+
+
+def is_follow_up(prompt: str) -> bool:
+  """
+  Whether the prompt pushes back on or asks to expand the previous answer.
+  """
+  return bool(_FOLLOW_UP_RE.search(prompt))
+
+
+def choose_tier(
+  prompt: str,
+  conversation_messages: int,
+  retrieval_score: Optional[float] = None,
+  follow_up: bool = False,
+  thresholds: Optional[dict[str, float]] = None,
+) -> tuple[str, str]:
+  """
+  Pick "small" or "large" for one LLM call and the reason for it.
+  """
+  limits = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+  if follow_up:
+    return "large", "follow_up"
+  if retrieval_score is not None and retrieval_score < limits["min_retrieval_score"]:
+    return "large", "low_retrieval_score"
+  if len(_WORD_RE.findall(prompt)) > limits["max_prompt_words"]:
+    return "large", "long_prompt"
+  if prompt.count("?") > limits["max_questions"]:
+    return "large", "multiple_questions"
+  if conversation_messages > limits["max_conversation_messages"]:
+    return "large", "long_conversation"
+  return "small", "default"
+
+
+class TierSelector:
+  """
+  Per-invocation tier state for the information agent. Once escalated,
+  the rest of the invocation stays on the large model.
+  """
+  def __init__(self, prompt: str, previous_tier: Optional[str] = None) -> None:
+    self.prompt = prompt
+    self.follow_up = previous_tier == "small" and is_follow_up(prompt)
+    self.retrieval_score: Optional[float] = None
+    self.tier: Optional[str] = None
+    self.reason: Optional[str] = None
+
+  def record_retrieval(self, results: list[dict[str, Any]]) -> None:
+    """
+    Keep the best FAQ score seen; an empty result counts as no confidence.
+    """
+    best = max((r.get("score", 0.0) for r in results), default=0.0)
+    self.retrieval_score = best if self.retrieval_score is None else max(self.retrieval_score, best)
+
+  def select(self, conversation_messages: int) -> tuple[str, str]:
+    """
+    Tier and model for the next LLM call. `conversation_messages` counts
+    user and assistant messages up to and including the current prompt,
+    tool calls and tool results are not counted.
+    """
+    if INFO_MODEL_TIERING in TIER_MODELS:
+      self.tier, self.reason = INFO_MODEL_TIERING, "pinned"
+    elif self.tier != "large":
+      self.tier, self.reason = choose_tier(
+        self.prompt, conversation_messages, self.retrieval_score, self.follow_up
+      )
+    return self.tier, TIER_MODELS[self.tier]
@@ -0,0 +1,162 @@
+# models/tool_cache.py
+
+import copy
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from internal.metrics import registry
+
+# Settings – override via env vars
+TOOL_CACHE: bool = os.getenv("TOOL_CACHE", "on") != "off"
+TOOL_CACHE_MAX_ENTRIES: int = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "5000"))
+
+# Metrics
+lookup_counter = registry.counter("tool_cache_lookups_total", "Cached tool calls by outcome (hit, miss)")
+hit_ratio_gauge = registry.gauge("tool_cache_hit_ratio", "Share of cached tool calls served from the cache")
+invalidation_counter = registry.counter("tool_cache_invalidations_total", "Cache entries dropped by mutating tools")
+
+CacheKey = tuple[str, str, Optional[str], str]
+
+
+def _normalize_user(username: Any) -> Optional[str]:
+  return str(username).strip().lower() if username is not None else None
+
+
+class ToolCache:
+  """
+  LRU cache of tool results with a TTL per entry. Entries are indexed by
+  user so a mutating tool can drop everything cached for that user.
+  """
+  def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES) -> None:
+    self.max_entries = max_entries
+    self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+    self._by_user: dict[str, set[CacheKey]] = {}
+    self._lock = threading.Lock()
+
+  def get(self, key: CacheKey) -> tuple[bool, Any]:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return False, None
+      expires, value = entry
+      if expires < time.monotonic():
+        self._drop(key)
+        return False, None
+      self._entries.move_to_end(key)
+      return True, value
+
+  def put(self, key: CacheKey, value: Any, ttl: float) -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic() + ttl, value)
+      self._entries.move_to_end(key)
+      user = key[2]
+      if user is not None:
+        self._by_user.setdefault(user, set()).add(key)
+      while len(self._entries) > self.max_entries:
+        self._drop(next(iter(self._entries)))
+
+  def invalidate_user(self, username: Any) -> int:
+    """
+    Drop every entry cached for `username`, in any conversation.
+    """
+    user = _normalize_user(username)
+    with self._lock:
+      keys = self._by_user.pop(user, set())
+      for key in keys:
+        self._entries.pop(key, None)
+    return len(keys)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self._by_user.clear()
+
+  def _drop(self, key: CacheKey) -> None:
+    self._entries.pop(key, None)
+    user = key[2]
+    if user is not None and user in self._by_user:
+      self._by_user[user].discard(key)
+      if not self._by_user[user]:
+        del self._by_user[user]
+
+
+# Shared cache for the tools of every agent
+tool_cache = ToolCache()
+
+
+def _conversation_id(config: Optional[dict[str, Any]]) -> Optional[str]:
+  if not config:
+    return None
+  return (config.get("configurable") or {}).get("conversation_id")
+
+
+def _record_lookup(tool: str, hit: bool) -> None:
+  lookup_counter.inc(tool=tool, outcome="hit" if hit else "miss")
+  hits = lookup_counter.value(tool=tool, outcome="hit")
+  misses = lookup_counter.value(tool=tool, outcome="miss")
+  hit_ratio_gauge.set(hits / (hits + misses), tool=tool)
+
+
+def cached_tool(ttl: float, user_arg: Optional[str] = "username") -> Callable[[Callable], Callable]:
+  """
+  Memoize a read-only tool for `ttl` seconds. Results are only reused
+  within the same conversation and for the same `user_arg` value. The
+  function must accept `config: RunnableConfig`, which carries the
+  conversation id, and calls without one are never cached.
+  """
+  def decorator(func: Callable) -> Callable:
+    signature = inspect.signature(func)
+    tool = func.__name__.lstrip("_")
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+      bound = signature.bind(*args, **kwargs)
+      bound.apply_defaults()
+      arguments = dict(bound.arguments)
+      conversation_id = _conversation_id(arguments.pop("config", None))
+      if not TOOL_CACHE or ttl <= 0 or conversation_id is None:
+        return func(*args, **kwargs)
+
+      user = _normalize_user(arguments.pop(user_arg, None)) if user_arg else None
+      key = (tool, conversation_id, user, json.dumps(arguments, sort_keys=True, default=str))
+      hit, value = tool_cache.get(key)
+      _record_lookup(tool, hit)
+      if hit:
+        return copy.deepcopy(value)
+
+      value = func(*args, **kwargs)
+      tool_cache.put(key, copy.deepcopy(value), ttl)
+      return value
+
+    return wrapper
+  return decorator
+
+
+def invalidates_user(user_arg: str = "username") -> Callable[[Callable], Callable]:
+  """
+  Mark a tool as mutating: once it ran, every cached result for the user
+  in `user_arg` is dropped, in every conversation.
+  """
+  def decorator(func: Callable) -> Callable:
+    signature = inspect.signature(func)
+    tool = func.__name__.lstrip("_")
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+      try:
+        return func(*args, **kwargs)
+      finally:
+        # Also on failure, the backend may have applied part of the change
+        username = signature.bind(*args, **kwargs).arguments.get(user_arg)
+        dropped = tool_cache.invalidate_user(username)
+        if dropped:
+          invalidation_counter.inc(dropped, tool=tool)
+
+    return wrapper
+  return decorator
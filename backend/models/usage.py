@@ -0,0 +1,93 @@
+# models/usage.py
+
+import logging
+from typing import Any, Optional
+
+from internal.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (uncached prompt, cached prompt, completion)
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+  "gpt-4o": (2.50, 1.25, 10.00),
+  "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+# Metrics
+prompt_tokens_counter = registry.counter("llm_prompt_tokens_total", "Prompt tokens sent upstream, split by cache status")
+completion_tokens_counter = registry.counter("llm_completion_tokens_total", "Completion tokens received from upstream")
+cost_counter = registry.counter("llm_cost_usd_total", "Estimated upstream cost in USD")
+call_latency_histogram = registry.histogram("llm_call_seconds", "Latency of single LLM calls")
+turn_cache_ratio_histogram = registry.histogram(
+  "llm_turn_cached_prompt_ratio",
+  "Share of each turn's prompt tokens served from the provider cache",
+  buckets=(0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+
+def new_usage() -> dict[str, float]:
+  """
+  Empty token usage accumulator.
+  """
+  return {"llm_calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+def merge_usage(total: dict[str, float], other: dict[str, float]) -> dict[str, float]:
+  """
+  Add the counts of `other` into `total` and return it.
+  """
+  for key, value in other.items():
+    total[key] = total.get(key, 0) + value
+  return total
+
+def estimate_cost(model: str, prompt: int, cached: int, completion: int) -> float:
+  """
+  Estimated USD cost of one call, 0 for models without a known price.
+  """
+  uncached_price, cached_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+  return ((prompt - cached) * uncached_price + cached * cached_price + completion * completion_price) / 1e6
+
+def record_usage(
+  usage: dict[str, float],
+  agent: str,
+  model: str,
+  response: Any,
+  tier: Optional[str] = None,
+  latency: Optional[float] = None,
+) -> None:
+  """
+  Read token usage from an LLM response into `usage` and the metrics registry.
+  """
+  meta = getattr(response, "usage_metadata", None) or {}
+  prompt = meta.get("input_tokens", 0) or 0
+  cached = (meta.get("input_token_details") or {}).get("cache_read", 0) or 0
+  completion = meta.get("output_tokens", 0) or 0
+
+  usage["llm_calls"] = usage.get("llm_calls", 0) + 1
+  usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + prompt
+  usage["cached_prompt_tokens"] = usage.get("cached_prompt_tokens", 0) + cached
+  usage["completion_tokens"] = usage.get("completion_tokens", 0) + completion
+
+  prompt_tokens_counter.inc(cached, agent=agent, model=model, cache="hit")
+  prompt_tokens_counter.inc(prompt - cached, agent=agent, model=model, cache="miss")
+  completion_tokens_counter.inc(completion, agent=agent, model=model)
+
+  # Per-tier cost and latency accounting
+  tier = tier or "fixed"
+  cost = estimate_cost(model, prompt, cached, completion)
+  usage["cost_usd"] = usage.get("cost_usd", 0.0) + cost
+  cost_counter.inc(cost, agent=agent, model=model, tier=tier)
+  if latency is not None:
+    call_latency_histogram.observe(latency, agent=agent, model=model, tier=tier)
+
+def report_turn_usage(usage: dict[str, float]) -> None:
+  """
+  Log and record the cached versus uncached prompt tokens of one chat turn.
+  """
+  prompt = usage.get("prompt_tokens", 0)
+  cached = usage.get("cached_prompt_tokens", 0)
+  if prompt > 0:
+    turn_cache_ratio_histogram.observe(cached / prompt)
+  logger.info(
+    "Turn usage: llm_calls=%d prompt_tokens=%d cached=%d uncached=%d completion_tokens=%d cost_usd=%.5f",
+    usage.get("llm_calls", 0), prompt, cached, prompt - cached, usage.get("completion_tokens", 0),
+    usage.get("cost_usd", 0.0),
+  )
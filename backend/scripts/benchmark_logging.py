@@ -0,0 +1,103 @@
+# scripts/benchmark_logging.py
+"""
+Measure the logging cost a chat turn pays on its own thread.
+
+Run from the backend directory:
+  python -m scripts.benchmark_logging [--turns 2000] [--threads 8] [--payload-chars 5000]
+
+Replays the log calls of a turn with tool calls (agent tools with large
+profile and issue payloads, tier and usage lines) from several threads,
+once with a synchronous stream handler like the old basicConfig setup
+and once through internal/log.py with sampling and rate limits off, so
+both runs write every record. A third run shows what a rate limit on the
+agent loggers drops; it is not comparable with the first two. Output
+goes to a temporary file so the numbers include real I/O.
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import threading
+import time
+
+import internal.log as log_setup
+
+action_logger = logging.getLogger("models.action")
+info_logger = logging.getLogger("models.information")
+usage_logger = logging.getLogger("models.usage")
+
+def one_turn(payload: str) -> None:
+  """
+  The log calls of one chat turn that used two tools.
+  """
+  profile_updates = {"address": payload, "bio": payload, "phone": "0612345678"}
+  info_logger.info("Tool call: faq_search(query=%s, k=%d)", "how do I reset my password", 3)
+  info_logger.info("Information agent tier: %s (%s)", "small", "strong retrieval")
+  action_logger.info("Tool call: update_user_profile(username=%s, fields=%s)", "root", list(profile_updates))
+  action_logger.info("Tool call: create_support_ticket(username=%s, issue=%s)", "root", payload)
+  usage_logger.info("Turn usage: %s", {"prompt_tokens": 1834, "completion_tokens": 92, "cost_usd": 0.0004})
+
+def run(turns: int, threads: int, payload: str) -> list[float]:
+  """
+  Per-turn seconds spent in logging calls, across all threads.
+  """
+  timings: list[float] = []
+  lock = threading.Lock()
+
+  def worker() -> None:
+    local = []
+    for _ in range(turns // threads):
+      started = time.perf_counter()
+      one_turn(payload)
+      local.append(time.perf_counter() - started)
+    with lock:
+      timings.extend(local)
+
+  pool = [threading.Thread(target=worker) for _ in range(threads)]
+  for t in pool:
+    t.start()
+  for t in pool:
+    t.join()
+  return timings
+
+def report(name: str, timings: list[float]) -> None:
+  timings.sort()
+  p99 = timings[min(int(len(timings) * 0.99), len(timings) - 1)]
+  print(f"{name:<12} mean {statistics.mean(timings) * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us  per turn")
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--turns", type=int, default=2000)
+  parser.add_argument("--threads", type=int, default=8)
+  parser.add_argument("--payload-chars", type=int, default=5000)
+  parser.add_argument("--rate-limit", type=float, default=20, help="records/s per agent logger in the limiter run")
+  args = parser.parse_args()
+  payload = "x" * args.payload_chars
+  root = logging.getLogger()
+
+  with tempfile.TemporaryFile("w") as sync_out, tempfile.TemporaryFile("w") as queue_out:
+    # Synchronous handler on the calling thread, as before
+    logging.basicConfig(
+      level=logging.INFO, stream=sync_out, format="%(asctime)s %(levelname)s %(name)s: %(message)s", force=True
+    )
+    report("synchronous", run(args.turns, args.threads, payload))
+
+    # Queue handler with truncation and JSON on the listener thread, nothing dropped
+    log_setup.setup_logging(stream=queue_out, sampling="", rate_limits="")
+    report("queued", run(args.turns, args.threads, payload))
+    log_setup.stop_logging()
+    print(f"dropped records: {log_setup.dropped_counter.snapshot() or 'none'}")
+
+    # Same, with a rate limit on the agent loggers
+    limits = f"models.action={args.rate_limit},models.information={args.rate_limit}"
+    log_setup.setup_logging(stream=queue_out, sampling="", rate_limits=limits)
+    report("rate limited", run(args.turns, args.threads, payload))
+    log_setup.stop_logging()
+    print(f"dropped records: {log_setup.dropped_counter.snapshot() or 'none'} (limiter run only)")
+
+    for handler in list(root.handlers):
+      root.removeHandler(handler)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,100 @@
+# scripts/benchmark_login_throttle.py
+"""
+Simulate credential stuffing against /auth/login and measure how a
+legitimate user's login latency holds up.
+
+Run from the backend directory (needs the same .env as the app):
+  python -m scripts.benchmark_login_throttle [--seconds 10] [--attackers 50] [--attacker-ips 10]
+
+Attackers spread over several client IPs try random usernames and
+passwords as fast as they can, while root logs in with the right
+password every 250 ms from its own IP. Runs once with the login
+throttle off and once with it on. With the throttle on, root should
+see no failed logins: the username bucket only refuses clients that
+failed recently.
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+import statistics
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import app, lifespan
+from internal.login_throttle import attempts_counter, login_throttle, throttled_counter
+
+def transport_for(ip: str) -> httpx.ASGITransport:
+  return httpx.ASGITransport(app=app, client=(ip, 40000))
+
+async def attacker(client: httpx.AsyncClient, deadline: float, usernames: list[str]) -> None:
+  while time.monotonic() < deadline:
+    data = {"username": secrets.choice(usernames), "password": secrets.token_hex(8)}
+    resp = await client.post("/auth/login", json=data)
+    if resp.status_code == 429:
+      # A well-behaved bot would wait, a stuffing bot just retries
+      await asyncio.sleep(0.01)
+
+async def legitimate(client: httpx.AsyncClient, deadline: float, password: str) -> tuple[list[float], int]:
+  latencies: list[float] = []
+  failures = 0
+  while time.monotonic() < deadline:
+    started = time.perf_counter()
+    resp = await client.post("/auth/login", json={"username": "root", "password": password})
+    latencies.append(time.perf_counter() - started)
+    failures += resp.status_code != 200
+    await asyncio.sleep(0.25)
+  return latencies, failures
+
+async def run_once(seconds: float, attackers: int, attacker_ips: int, password: str) -> None:
+  usernames = ["root", "admin", "test"] + [f"user{i}" for i in range(50)]
+  deadline = time.monotonic() + seconds
+  clients = [
+    httpx.AsyncClient(transport=transport_for(f"203.0.113.{i % attacker_ips + 1}"), base_url="http://benchmark")
+    for i in range(attackers)
+  ]
+  legit_client = httpx.AsyncClient(transport=transport_for("198.51.100.7"), base_url="http://benchmark")
+  try:
+    results = await asyncio.gather(
+      legitimate(legit_client, deadline, password),
+      *(attacker(client, deadline, usernames) for client in clients),
+    )
+  finally:
+    for client in clients + [legit_client]:
+      await client.aclose()
+
+  latencies, failures = results[0]
+  latencies.sort()
+  p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+  print(
+    f"  legitimate: {len(latencies)} logins, {failures} failed, "
+    f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms"
+  )
+
+async def run(seconds: float, attackers: int, attacker_ips: int) -> None:
+  password = os.getenv("ROOT_PASSWORD", "")
+  async with lifespan(app):
+    for enabled in (False, True):
+      login_throttle.enabled = enabled
+      before = attempts_counter.snapshot()
+      print(f"throttle {'on' if enabled else 'off'}:")
+      await run_once(seconds, attackers, attacker_ips, password)
+      after = attempts_counter.snapshot()
+      print(f"  attempts: { {k: v - before.get(k, 0) for k, v in after.items()} }")
+    print(f"throttled by reason: {throttled_counter.snapshot()}")
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--seconds", type=float, default=10)
+  parser.add_argument("--attackers", type=int, default=50)
+  parser.add_argument("--attacker-ips", type=int, default=10)
+  args = parser.parse_args()
+  asyncio.run(run(args.seconds, args.attackers, args.attacker_ips))
+
+if __name__ == "__main__":
+  main()
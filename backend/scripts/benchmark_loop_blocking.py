@@ -0,0 +1,71 @@
+# scripts/benchmark_loop_blocking.py
+"""
+Fail when an HTTP handler blocks the event loop past a budget.
+
+Run from the backend directory (needs the same .env as the app):
+  python -m scripts.benchmark_loop_blocking [--budget-ms 50] [--concurrency 20] [--rounds 5]
+
+Drives the app in-process with concurrent logins, token validations and
+information page loads. Exits with status 1 if the loop stalled for
+longer than the budget, printing the stack that blocked it.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import app, lifespan
+from internal.login_throttle import login_throttle
+from internal.watchdog import LoopBlockedError, loop_block_budget
+
+async def one_round(client: httpx.AsyncClient, password: str) -> None:
+  """
+  Log in, validate the token and load the information page.
+  """
+  resp = await client.post("/auth/login", json={"username": "root", "password": password})
+  resp.raise_for_status()
+  token = resp.json()["access_token"]
+  resp = await client.get("/auth/validate", headers={"Authorization": f"Bearer {token}"})
+  resp.raise_for_status()
+  resp = await client.get("/information/")
+  resp.raise_for_status()
+
+async def run(budget_ms: float, concurrency: int, rounds: int) -> int:
+  password = os.getenv("ROOT_PASSWORD", "")
+  transport = httpx.ASGITransport(app=app)
+  # Every round logs root in from the same client, which is not what the gate measures
+  login_throttle.enabled = False
+
+  async with lifespan(app):
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+      try:
+        async with loop_block_budget(budget_ms) as checker:
+          started = time.perf_counter()
+          for _ in range(rounds):
+            await asyncio.gather(*(one_round(client, password) for _ in range(concurrency)))
+          elapsed = time.perf_counter() - started
+      except LoopBlockedError as e:
+        print(f"FAIL: {e}")
+        return 1
+
+  total = concurrency * rounds
+  print(f"OK: {total} rounds in {elapsed:.2f}s, max loop lag {checker.max_lag * 1000:.1f} ms (budget {budget_ms:.0f} ms)")
+  return 0
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--budget-ms", type=float, default=50)
+  parser.add_argument("--concurrency", type=int, default=20)
+  parser.add_argument("--rounds", type=int, default=5)
+  args = parser.parse_args()
+  sys.exit(asyncio.run(run(args.budget_ms, args.concurrency, args.rounds)))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,95 @@
+# scripts/evaluate_faq_search.py
+"""
+Trade off recall against latency for FAQ vector search settings.
+
+Run from the backend directory:
+  python -m scripts.evaluate_faq_search [labeled.jsonl] [--k 3]
+
+Each line of the labeled set is {"query": str, "relevant": [question, ...]}.
+Queries with no relevant questions measure how often noise slips through.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from data.search.faq import search_faqs
+from models.embedding import embed_texts
+
+DEFAULT_DATASET = Path(__file__).parent / "data" / "faq_queries.jsonl"
+CANDIDATE_FACTORS = (2, 5, 10, 20, 50)
+MIN_SCORES: tuple[Optional[float], ...] = (None, 0.8, 0.85, 0.88, 0.9)
+
+def load_dataset(path: Path) -> list[dict[str, Any]]:
+  """
+  Read the labeled query set.
+  """
+  with open(path, encoding="utf-8") as f:
+    return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(
+  dataset: list[dict[str, Any]],
+  vectors: list[list[float]],
+  k: int,
+  factor: int,
+  min_score: Optional[float],
+) -> dict[str, float]:
+  """
+  Run every query with one setting and compute recall, noise and latency.
+  """
+  hits = relevant_total = returned = noise = 0
+  latencies: list[float] = []
+
+  for entry, vec in zip(dataset, vectors):
+    started = time.perf_counter()
+    results = search_faqs(
+      entry["query"], k=k, num_candidates=k * factor,
+      min_score=min_score, filters=entry.get("filters"), query_vector=vec,
+    )
+    latencies.append((time.perf_counter() - started) * 1000)
+
+    relevant = set(entry.get("relevant", []))
+    found = {r.question for r in results}
+    hits += len(relevant & found)
+    relevant_total += len(relevant)
+    returned += len(results)
+    noise += len(found - relevant)
+
+  latencies.sort()
+  return {
+    "recall": hits / relevant_total if relevant_total else 0.0,
+    "noise_per_query": noise / len(dataset),
+    "results_per_query": returned / len(dataset),
+    "p50_ms": statistics.median(latencies),
+    "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("dataset", nargs="?", type=Path, default=DEFAULT_DATASET)
+  parser.add_argument("--k", type=int, default=3)
+  args = parser.parse_args()
+
+  dataset = load_dataset(args.dataset)
+  # Embed once so the timings only cover the vector search itself
+  vectors = embed_texts([entry["query"] for entry in dataset])
+
+  print(f"{'candidates':>10} {'min_score':>9} {'recall':>7} {'noise/q':>8} {'results/q':>9} {'p50 ms':>8} {'p95 ms':>8}")
+  for factor in CANDIDATE_FACTORS:
+    for min_score in MIN_SCORES:
+      row = evaluate(dataset, vectors, args.k, factor, min_score)
+      print(
+        f"{args.k * factor:>10} {'-' if min_score is None else min_score:>9} "
+        f"{row['recall']:>7.2f} {row['noise_per_query']:>8.2f} {row['results_per_query']:>9.2f} "
+        f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f}"
+      )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,124 @@
+# scripts/evaluate_tiering.py
+"""
+Tune the information agent's model tiering thresholds offline.
+
+Run from the backend directory:
+  python -m scripts.evaluate_tiering conversations.jsonl
+
+Each line is one recorded conversation:
+  {"messages": [
+    {"role": "user", "content": "...", "needs_large": false, "retrieval_score": 0.93},
+    {"role": "assistant", "content": "..."},
+    ...
+  ]}
+`needs_large` labels whether the small model's answer was not good enough,
+`retrieval_score` is the best FAQ score seen for that turn (optional).
+The policy is replayed for every threshold combination, best first.
+"""
+
+import argparse
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from models.tiering import DEFAULT_THRESHOLDS, TIER_MODELS, choose_tier, is_follow_up
+from models.usage import MODEL_PRICES
+
+GRID: dict[str, tuple[float, ...]] = {
+  "max_prompt_words": (20, 40, 80),
+  "max_questions": (1, 2),
+  "max_conversation_messages": (12, 24, 48),
+  "min_retrieval_score": (0.85, 0.88, 0.9, 0.92),
+}
+
+def load_turns(path: Path) -> list[list[dict[str, Any]]]:
+  """
+  Read recorded conversations as lists of labeled user turns with their position.
+  """
+  conversations = []
+  with open(path, encoding="utf-8") as f:
+    for line in f:
+      if not line.strip():
+        continue
+      messages = json.loads(line)["messages"]
+      turns = []
+      # Same measure as live: user and assistant messages so far, this prompt included
+      dialogue = 0
+      for msg in messages:
+        if msg.get("role") not in ("user", "assistant"):
+          continue
+        dialogue += 1
+        if msg["role"] == "user" and "needs_large" in msg:
+          turns.append({**msg, "conversation_messages": dialogue})
+      conversations.append(turns)
+  return conversations
+
+def replay(conversations: list[list[dict[str, Any]]], thresholds: dict[str, float]) -> dict[str, float]:
+  """
+  Run the policy over every labeled turn and score it.
+  """
+  total = correct = under = small = 0
+  cost = 0.0
+  small_price = MODEL_PRICES.get(TIER_MODELS["small"], (0.0, 0.0, 0.0))[0]
+  large_price = MODEL_PRICES.get(TIER_MODELS["large"], (1.0, 0.0, 0.0))[0] or 1.0
+
+  for turns in conversations:
+    previous_tier: Optional[str] = None
+    for turn in turns:
+      tier, _ = choose_tier(
+        turn["content"],
+        turn["conversation_messages"],
+        turn.get("retrieval_score"),
+        follow_up=previous_tier == "small" and is_follow_up(turn["content"]),
+        thresholds=thresholds,
+      )
+      previous_tier = tier
+      needs_large = bool(turn["needs_large"])
+
+      total += 1
+      correct += (tier == "large") == needs_large
+      under += tier == "small" and needs_large
+      small += tier == "small"
+      cost += small_price if tier == "small" else large_price
+
+  total = total or 1
+  return {
+    "accuracy": correct / total,
+    "under_escalation": under / total,
+    "small_share": small / total,
+    # Relative to always answering with the large model
+    "relative_cost": cost / (total * large_price),
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("conversations", type=Path)
+  parser.add_argument("--top", type=int, default=10)
+  parser.add_argument("--max-under-escalation", type=float, default=0.05)
+  args = parser.parse_args()
+
+  conversations = load_turns(args.conversations)
+
+  rows = []
+  for values in itertools.product(*GRID.values()):
+    thresholds = dict(zip(GRID.keys(), values))
+    rows.append((thresholds, replay(conversations, thresholds)))
+  current = replay(conversations, DEFAULT_THRESHOLDS)
+
+  # Cheapest settings that keep quality misses under the budget
+  allowed = [r for r in rows if r[1]["under_escalation"] <= args.max_under_escalation] or rows
+  allowed.sort(key=lambda r: (r[1]["relative_cost"], -r[1]["accuracy"]))
+
+  header = f"{'words':>5} {'qs':>3} {'msgs':>5} {'score':>6} {'acc':>6} {'under':>6} {'small':>6} {'cost':>6}"
+  print(header)
+  for thresholds, row in [(DEFAULT_THRESHOLDS, current)] + allowed[:args.top]:
+    print(
+      f"{thresholds['max_prompt_words']:>5.0f} {thresholds['max_questions']:>3.0f} "
+      f"{thresholds['max_conversation_messages']:>5.0f} {thresholds['min_retrieval_score']:>6.2f} "
+      f"{row['accuracy']:>6.2f} {row['under_escalation']:>6.2f} {row['small_share']:>6.2f} {row['relative_cost']:>6.2f}"
+    )
+  print("(first row is the current configuration)")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,81 @@
+# scripts/evaluate_vector_compression.py
+"""
+Compare compact FAQ vector storage against full-precision search.
+
+Run from the backend directory:
+  python -m scripts.evaluate_vector_compression [labeled.jsonl] [--k 3]
+
+For every storage format and dimension count it reports the stored size
+per vector, the overlap of its top-k with full-precision top-k, the mean
+score drift and the recall on the labeled query set.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from data.search.faq import get_faqs_collection
+from data.search.local_index import LocalVectorIndex
+from data.search.vectors import STORAGE_KINDS, encode_vector, vector_nbytes
+from models.embedding import embed_texts_array
+from scripts.evaluate_faq_search import DEFAULT_DATASET, load_dataset
+
+DIMENSIONS: tuple[Optional[int], ...] = (None, 1024, 512, 256)
+
+def build_index(questions: list[dict[str, Any]], vectors: np.ndarray, storage: str, dimensions: Optional[int]) -> tuple[LocalVectorIndex, int]:
+  """
+  Encode every vector in one format and return the index and bytes per vector.
+  """
+  docs = []
+  size = 0
+  for doc, vec in zip(questions, vectors):
+    encoded = encode_vector(vec, storage=storage, dimensions=dimensions)
+    size += vector_nbytes(encoded)
+    docs.append({**doc, "question_vector": encoded})
+  return LocalVectorIndex(docs), size // max(len(docs), 1)
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("dataset", nargs="?", type=Path, default=DEFAULT_DATASET)
+  parser.add_argument("--k", type=int, default=3)
+  args = parser.parse_args()
+
+  # Re-embed the stored questions so the baseline is full precision
+  questions = list(get_faqs_collection().find({}, {"_id": 0, "question": 1, "answer": 1}))
+  doc_vectors = embed_texts_array([q["question"] for q in questions])
+
+  dataset = load_dataset(args.dataset)
+  query_vectors = embed_texts_array([entry["query"] for entry in dataset])
+
+  baseline, _ = build_index(questions, doc_vectors, "array", None)
+  baseline_results = [baseline.search(q, k=args.k) for q in query_vectors]
+
+  print(f"{'storage':>8} {'dims':>5} {'bytes/vec':>9} {'index MB':>9} {'overlap@k':>9} {'score drift':>11} {'recall':>7}")
+  for storage in STORAGE_KINDS:
+    for dimensions in DIMENSIONS:
+      index, per_vector = build_index(questions, doc_vectors, storage, dimensions)
+
+      overlap = drift = hits = relevant_total = 0.0
+      for entry, q, expected in zip(dataset, query_vectors, baseline_results):
+        results = index.search(q, k=args.k)
+        got = {r["question"]: r["score"] for r in results}
+        overlap += len(got.keys() & {r["question"] for r in expected}) / max(len(expected), 1)
+        drift += sum(abs(got.get(r["question"], 0.5) - r["score"]) for r in expected) / max(len(expected), 1)
+
+        relevant = set(entry.get("relevant", []))
+        hits += len(relevant & got.keys())
+        relevant_total += len(relevant)
+
+      n = len(dataset)
+      print(
+        f"{storage:>8} {dimensions or doc_vectors.shape[1]:>5} {per_vector:>9} {index.nbytes / 1e6:>9.3f} "
+        f"{overlap / n:>9.3f} {drift / n:>11.4f} {hits / relevant_total if relevant_total else 0:>7.2f}"
+      )
+
+if __name__ == "__main__":
+  main()
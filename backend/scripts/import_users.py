@@ -0,0 +1,53 @@
+# scripts/import_users.py
+"""
+Create user accounts in bulk from a CSV or JSON lines file.
+
+Run from the backend directory (needs the same .env as the app):
+  python -m scripts.import_users users.csv [--format csv|jsonl] [--chunk-size 500] [--workers 8]
+
+CSV files need a header with username, email and password columns,
+JSON lines files one object with those keys per line. Prints the
+throughput and every row that could not be imported.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from data.db.setup import init_db
+from data.db.handlers.user_import import (
+  USER_IMPORT_CHUNK_SIZE, USER_IMPORT_WORKERS, import_users, iter_user_rows, shutdown_hash_pool
+)
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("path", type=Path)
+  parser.add_argument("--format", choices=("csv", "jsonl"), default=None)
+  parser.add_argument("--chunk-size", type=int, default=USER_IMPORT_CHUNK_SIZE)
+  parser.add_argument("--workers", type=int, default=USER_IMPORT_WORKERS)
+  args = parser.parse_args()
+  fmt = args.format or ("jsonl" if args.path.suffix in (".jsonl", ".ndjson") else "csv")
+
+  init_db()
+  try:
+    with args.path.open(encoding="utf-8-sig", newline="") as stream:
+      report = import_users(
+        iter_user_rows(stream, fmt), chunk_size=args.chunk_size, workers=args.workers, max_errors=sys.maxsize
+      )
+  finally:
+    shutdown_hash_pool()
+
+  for error in report.errors:
+    print(f"row {error.row} ({error.username or '-'}): {error.error}")
+  print(
+    f"{report.created} of {report.total} users created, {report.failed} failed, "
+    f"{report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)"
+  )
+  sys.exit(1 if report.failed else 0)
+
+if __name__ == "__main__":
+  main()
@@ -13,6 +13,29 @@ export interface Message {
 }
 
 const WS_URL = 'ws://127.0.0.1:8000/chat/ws';
+const CONVERSATION_KEY = 'chatConversationId';
+const PROTOCOL = 'round2.json.v1';
+
+/**
+ * Typed envelope sent by the server over the versioned protocol.
+ */
+interface Envelope {
+  type: 'session' | 'ack' | 'response' | 'busy' | 'error';
+  id?: number | null;
+  identity?: string;
+  message?: string;
+  conversation_id?: string;
+  resumed?: boolean;
+  history?: Message[];
+}
+
+/**
+ * Map a legacy frame ({identity, message} or {status, ...}) to an envelope.
+ */
+function fromLegacy(data: Record<string, any>): Envelope {
+  if (data.status) return { ...data, type: data.status };
+  return { ...data, type: 'response' };
+}
 
 /**
  * Custom hook to manage a persistent chat WebSocket connection.
@@ -23,6 +46,7 @@ export function useChatWebSocket() {
   const identityRef = useRef<string | null>(null);
 
   const socketRef = useRef<WebSocket | null>(null);
+  const nextIdRef = useRef(1);
   const isAtBottomRef = useRef(true);
   const containerRef = useRef<HTMLDivElement>(null);
 
@@ -49,26 +73,57 @@ export function useChatWebSocket() {
    * Send text to the server via WebSocket (opens connection if needed).
    */
   const sendMessage = useCallback((text: string) => {
+    // Servers that do not speak the versioned protocol take plain text
+    const send = (socket: WebSocket) => {
+      if (socket.protocol === PROTOCOL) {
+        socket.send(JSON.stringify({ type: 'prompt', id: nextIdRef.current++, text }));
+      } else {
+        socket.send(text);
+      }
+    };
+
     if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
-      socketRef.current.send(text);
+      send(socketRef.current);
     } else {
       const token = localStorage.getItem('authToken');
-      const params = token ? `?token=${encodeURIComponent(token)}` : '';
-      const socket = new WebSocket(`${WS_URL}${params}`);
+      const conversationId = sessionStorage.getItem(CONVERSATION_KEY);
+      const query = new URLSearchParams();
+      if (token) query.set('token', token);
+      if (conversationId) query.set('conversation_id', conversationId);
+      const params = query.toString() ? `?${query.toString()}` : '';
+      const socket = new WebSocket(`${WS_URL}${params}`, [PROTOCOL]);
       socketRef.current = socket;
 
       socket.onopen = () => {
-        socket.send(text);
+        send(socket);
       };
 
       socket.onmessage = (event: MessageEvent) => {
         try {
-          const data: Message = JSON.parse(event.data);
-          if (data.identity !== identityRef.current) {
-            setIdentity(data.identity);
-            addMessage({ identity: 'new-identity', message: `You are now chatting with ${data.identity}` });
+          const raw = JSON.parse(event.data);
+          const data: Envelope = socket.protocol === PROTOCOL ? raw : fromLegacy(raw);
+          if (data.type === 'session') {
+            sessionStorage.setItem(CONVERSATION_KEY, data.conversation_id ?? '');
+            // Restore the transcript before the prompt that opened the socket
+            const history = data.history ?? [];
+            if (data.resumed) {
+              setMessages(prev => (prev.length <= 1 ? [...history, ...prev] : prev));
+            }
+            return;
+          }
+          if (data.type === 'ack') {
+            return;
+          }
+          if (data.type === 'busy' || data.type === 'error') {
+            addMessage({ identity: 'system', message: data.message ?? 'Something went wrong.' });
+            return;
+          }
+          const identity = data.identity ?? 'system';
+          if (identity !== identityRef.current) {
+            setIdentity(identity);
+            addMessage({ identity: 'new-identity', message: `You are now chatting with ${identity}` });
           }
-          addMessage(data);
+          addMessage({ identity, message: data.message ?? '' });
         } catch {
           console.error('Invalid message format');
         }